@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -138,18 +139,56 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Product image derivatives (widths in px, rendered as WebP and JPEG)
+PRODUCT_IMAGE_WIDTHS = [int(w) for w in config('PRODUCT_IMAGE_WIDTHS', default='160,320,640').split(',')]
+# Processes used to render them; 0 renders inline in the request
+PRODUCT_IMAGE_WORKERS = config('PRODUCT_IMAGE_WORKERS', default=2, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache
+# Local memory by default, which only suits a single process. Production must share one cache between
+# every worker (docker-compose points CACHE_BACKEND/CACHE_LOCATION at its Redis service); see core.checks.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='invera-tech-store'),
+    }
+}
+
+# Public catalog response cache (seconds)
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=300, cast=int)
+CATALOG_CACHE_LOCK_TIMEOUT = config('CATALOG_CACHE_LOCK_TIMEOUT', default=5, cast=int)
+
+# Idempotency-Key handling (seconds): how long responses are replayed, how long the
+# in-flight lock lives and how long a concurrent duplicate waits for the first response
+IDEMPOTENCY_TTL = config('IDEMPOTENCY_TTL', default=86400, cast=int)
+IDEMPOTENCY_LOCK_TIMEOUT = config('IDEMPOTENCY_LOCK_TIMEOUT', default=30, cast=int)
+IDEMPOTENCY_WAIT = config('IDEMPOTENCY_WAIT', default=5, cast=int)
+
+# Transactional outbox (core.outbox): attempts before an event is parked, first retry delay in seconds
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=8, cast=int)
+OUTBOX_RETRY_DELAY = config('OUTBOX_RETRY_DELAY', default=30, cast=int)
+
+# Email sent by outbox handlers; the console backend just prints messages
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='Invera Tech Store <orders@localhost>')
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -163,6 +202,52 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Seconds a process reuses the user behind a JWT before reading it again; 0 (the default) reads it on
+# every request. Only honoured with a shared cache, where saving a user invalidates it at once in
+# every process (core.authentication).
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=0, cast=int)
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=10000, cast=int)
+
+# Product catalog pagination (?page_size= is capped at the maximum)
+PRODUCT_PAGE_SIZE = config('PRODUCT_PAGE_SIZE', default=24, cast=int)
+PRODUCT_MAX_PAGE_SIZE = config('PRODUCT_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Order history pagination
+ORDER_PAGE_SIZE = config('ORDER_PAGE_SIZE', default=20, cast=int)
+ORDER_MAX_PAGE_SIZE = config('ORDER_MAX_PAGE_SIZE', default=100, cast=int)
+
+# Most orders one bulk status change may touch
+ORDER_BULK_STATUS_LIMIT = config('ORDER_BULK_STATUS_LIMIT', default=5000, cast=int)
+
+# Stock reservations
+# How long adding an item to the cart holds its stock before the sweeper releases it
+STOCK_RESERVATION_TTL = timedelta(minutes=config('STOCK_RESERVATION_TTL_MINUTES', default=15, cast=int))
+
+# Cart store: 'database' keeps carts in CartItem rows only, 'cache' serves them from the cache
+# and writes CartItem rows behind (before checkout and on flush_carts runs). 'cache' needs a shared cache
+# and the app refuses to start on a per-process one.
+CART_STORE = config('CART_STORE', default='database')
+# How long an untouched cart stays cached; keep it well above the flush_carts interval
+CART_CACHE_TIMEOUT = config('CART_CACHE_TIMEOUT', default=7 * 24 * 3600, cast=int)
+# Seconds before the cached price and stock of cart products are re-read
+CART_SNAPSHOT_TTL = config('CART_SNAPSHOT_TTL', default=300, cast=int)
+CART_LOCK_TIMEOUT = config('CART_LOCK_TIMEOUT', default=10, cast=int)
+
+# Sales rollups: seconds each incremental run re-reads behind its watermark, to catch late commits
+SALES_ROLLUP_LAG = config('SALES_ROLLUP_LAG', default=300, cast=int)
+
+# Where order_partitions --archive-before writes old order partitions (gzip JSONL)
+ORDER_ARCHIVE_DIR = config('ORDER_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+
+# Maintenance commands run by run_periodic_commands (the compose `scheduler` service): (command, seconds
+# between runs). Without them expired stock holds are only released when a request comes up short.
+PERIODIC_COMMANDS = [
+    ('release_expired_reservations', 60),
+    ('flush_carts', 60),
+    ('update_sales_rollups', 300),
+    ('cleanup_carts', 24 * 3600),
+]
+
 # CORS Settings
 # Default CORS origins for development and Docker
 CORS_ALLOWED_ORIGINS = config(
@@ -172,6 +257,8 @@ CORS_ALLOWED_ORIGINS = config(
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+
 # Custom Authentication Backends
 # Allows login with email OR username
 AUTHENTICATION_BACKENDS = [
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from django.utils import timezone
+from .models import OutboxEvent, User
 
 
 @admin.register(User)
@@ -16,3 +17,15 @@ class UserAdmin(BaseUserAdmin):
         ('Additional Info', {'fields': ('email',)}),
     )
 
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    """Pending and failed outbox events; processed events are deleted."""
+    list_display = ('id', 'event_type', 'attempts', 'available_at', 'failed_at', 'created_at')
+    list_filter = ('event_type', ('failed_at', admin.EmptyFieldListFilter))
+    readonly_fields = ('event_type', 'payload', 'attempts', 'last_error', 'created_at')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected events now')
+    def retry_now(self, request, queryset):
+        queryset.update(failed_at=None, attempts=0, available_at=timezone.now())
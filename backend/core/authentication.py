@@ -0,0 +1,73 @@
+"""
+JWT authentication that can resolve the token's user from a short-lived
+per-process cache instead of a SELECT on every request.
+
+Entries are keyed by user id and checked against a per-user version kept
+in the shared cache; saving or deleting a user bumps it (core.signals),
+so role changes, deactivation and password changes take effect on the
+next request in every process. That only holds when the cache is shared,
+so the user cache stays off on per-process backends (local memory)
+whatever AUTH_USER_CACHE_TTL says. It is off by default too: it saves
+one indexed primary key lookup per request, which only pays off when the
+database round trip is slow compared to the cache (see bench_auth).
+QuerySet.update() on users sends no signals: call bump_user_version().
+"""
+import copy
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from .utils import cache_is_shared
+
+_users = {}
+_lock = threading.Lock()
+
+
+def user_version_key(user_id):
+    return f'auth:user:{user_id}:version'
+
+
+def get_user_version(user_id):
+    """Current version of a user; starts from the clock like the catalog version, so eviction cannot resurrect it"""
+    key = user_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    """Make every process load the user from the database again"""
+    key = user_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), timeout=None)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with cached user lookups when AUTH_USER_CACHE_TTL > 0 and the cache is shared"""
+
+    def get_user(self, validated_token):
+        # Revocation relies on every process seeing the version bump
+        ttl = settings.AUTH_USER_CACHE_TTL if cache_is_shared() else 0
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not ttl or user_id is None:
+            return super().get_user(validated_token)
+
+        version = get_user_version(user_id)
+        entry = _users.get(user_id)
+        if entry and entry[0] == version and entry[1] > time.monotonic():
+            # Requests must not share one instance
+            return copy.copy(entry[2])
+
+        # Inactive and unknown users raise here and are never cached
+        user = super().get_user(validated_token)
+        with _lock:
+            if len(_users) >= settings.AUTH_USER_CACHE_SIZE:
+                _users.clear()
+            _users[user_id] = (version, time.monotonic() + ttl, user)
+        return copy.copy(user)
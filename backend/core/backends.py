@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from .models import lower_equals
 
 
 class EmailOrUsernameBackend(ModelBackend):
@@ -21,7 +21,7 @@ class EmailOrUsernameBackend(ModelBackend):
         try:
             # Try to find user by username OR email
             user = UserModel.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
+                lower_equals('username', username) | lower_equals('email', username)
             )
         except UserModel.DoesNotExist:
             # Run the default password hasher to reduce timing attacks
@@ -30,7 +30,7 @@ class EmailOrUsernameBackend(ModelBackend):
         except UserModel.MultipleObjectsReturned:
             # In case of multiple matches (shouldn't happen with unique constraints)
             user = UserModel.objects.filter(
-                Q(username__iexact=username) | Q(email__iexact=username)
+                lower_equals('username', username) | lower_equals('email', username)
             ).first()
         
         if user.check_password(password) and self.user_can_authenticate(user):
@@ -0,0 +1,39 @@
+"""
+Helpers shared by the bench_* management commands: a transaction that
+discards the synthetic data a benchmark writes, and latency timing.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+from django.db import transaction
+
+
+class Rollback(Exception):
+    """Raised to discard everything written inside rolled_back()"""
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back"""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def time_calls(run, inputs):
+    """
+    Call run(value) for each input, after one warm-up call, and return the
+    (median, p95) latency in milliseconds.
+    """
+    run(inputs[0])
+    timings = []
+    for value in inputs:
+        start = time.perf_counter()
+        run(value)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+    return statistics.median(timings), p95
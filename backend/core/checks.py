@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+from .utils import cache_is_shared
+
+
+def process_local_cache(hint, id):
+    return [Warning(
+        f'CACHES["default"] uses {settings.CACHES["default"]["BACKEND"]}, which is private to each process.',
+        hint=f'{hint} Set CACHE_BACKEND/CACHE_LOCATION to a shared cache such as Redis.',
+        id=id,
+    )]
+
+
+@register(deploy=True)
+def check_catalog_cache(app_configs, **kwargs):
+    """The catalog version is bumped in one process and must reach every other one"""
+    if cache_is_shared():
+        return []
+    return process_local_cache(
+        'Other workers, management commands and the outbox worker never see catalog version bumps, '
+        'so they serve stale prices and stock for up to CATALOG_CACHE_TIMEOUT.',
+        'core.W001'
+    )
+
+
+@register(deploy=True)
+def check_idempotency_cache(app_configs, **kwargs):
+    """Idempotency keys must be seen by whichever worker a retry lands on"""
+    if cache_is_shared():
+        return []
+    return process_local_cache(
+        'A retried POST /api/orders/checkout/ that reaches another worker is not deduplicated '
+        'and can create a second order.',
+        'core.W002'
+    )
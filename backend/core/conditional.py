@@ -0,0 +1,39 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """
+    Answer If-None-Match / If-Modified-Since with 304 Not Modified before
+    the view loads or serializes anything.
+    Views must override get_validators(), cheaply: it runs on every GET.
+    """
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Return (etag_parts, last_modified), to be overridden by every view.
+        etag_parts is a tuple of values that change whenever the response
+        would (the path and query string are added here); None skips the
+        check. last_modified is a datetime or None for ETag only.
+        """
+        raise NotImplementedError(f'{type(self).__name__} must implement get_validators()')
+
+    def get(self, request, *args, **kwargs):
+        parts, last_modified = self.get_validators(request, *args, **kwargs)
+        if parts is None:
+            return super().get(request, *args, **kwargs)
+
+        source = '|'.join(str(part) for part in (request.get_full_path(), request.accepted_renderer.format, *parts))
+        etag = quote_etag(hashlib.md5(source.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
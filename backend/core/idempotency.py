@@ -0,0 +1,89 @@
+import functools
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def replay(stored):
+    response = Response(stored['data'], status=stored['status'])
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def is_stored(response):
+    """Server errors and conflicts are transient: a retry with the same key must run again"""
+    return response.status_code < 500 and response.status_code != status.HTTP_409_CONFLICT
+
+
+def wait_for(cache_key, lock_key):
+    """
+    A request with the same key is running: wait for its response, or
+    reject. Also rejects once it finishes without storing one.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        finished = cache.get(lock_key) is None  # Read first: the response is stored before the lock goes
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return replay(stored)
+        if finished:
+            break
+    return Response(
+        {'error': f'A request with this {IDEMPOTENCY_HEADER} is still in progress'},
+        status=status.HTTP_409_CONFLICT
+    )
+
+
+def idempotent(scope):
+    """
+    Make an APIView handler safe to retry with an Idempotency-Key header.
+
+    The first response for a (scope, user, key) is stored in the cache for
+    IDEMPOTENCY_TTL seconds and replayed to later requests with the same key
+    without running the handler again. A cache.add() lock serializes
+    concurrent duplicates: they wait briefly for the stored response, then
+    get 409. Server errors and 409 responses (stock or cart changed
+    meanwhile) are not stored, so the client can retry them with the same key.
+    Retries only dedupe across workers when the cache is shared by all of
+    them (the compose Redis; deploy check core.W002).
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not key:
+                return handler(self, request, *args, **kwargs)
+            if len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            cache_key = f'idempotency:{scope}:{request.user.pk}:{key}'
+            stored = cache.get(cache_key)
+            if stored is not None:
+                return replay(stored)
+
+            lock_key = f'{cache_key}:lock'
+            if not cache.add(lock_key, 1, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                return wait_for(cache_key, lock_key)
+
+            try:
+                response = handler(self, request, *args, **kwargs)
+                if is_stored(response):
+                    cache.set(
+                        cache_key,
+                        {'status': response.status_code, 'data': response.data},
+                        timeout=settings.IDEMPOTENCY_TTL
+                    )
+                return response
+            finally:
+                cache.delete(lock_key)
+        return wrapper
+    return decorator
@@ -0,0 +1,58 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+from core.bench import rolled_back
+from core.models import User
+from core.utils import cache_is_shared
+from orders.models import Cart, CartItem
+from orders.views import CartViewSet
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Compare GET /api/cart/ requests per second with and without cached JWT users (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests timed per strategy')
+        parser.add_argument('--items', type=int, default=5, help='Lines in the synthetic cart')
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            raise CommandError('Cached JWT users are disabled on a per-process cache; point CACHE_BACKEND at Redis')
+        with rolled_back():
+            user = User.objects.create_user('bench-auth', 'bench-auth@example.com', 'unused')
+            cart = Cart.objects.create(user=user)
+            products = Product.objects.bulk_create([
+                Product(name=f'Bench product {i}', description='', price=10, stock_quantity=100)
+                for i in range(options['items'])
+            ])
+            CartItem.objects.bulk_create([CartItem(cart=cart, product=product) for product in products])
+
+            # Called in-process: measures authentication and the view, not HTTP or middleware
+            view = CartViewSet.as_view({'get': 'cart'})
+            header = f'Bearer {AccessToken.for_user(user)}'
+            factory = APIRequestFactory()
+
+            def request():
+                response = view(factory.get('/api/cart/', HTTP_AUTHORIZATION=header))
+                assert response.status_code == 200, response.status_code
+
+            for label, ttl in (('database', 0), ('cached', 60)):
+                with override_settings(AUTH_USER_CACHE_TTL=ttl):
+                    self.report(label, request, options['requests'])
+
+    def report(self, label, request, count):
+        request()  # Warm up
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        start = time.perf_counter()
+        for _ in range(count):
+            request()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{label:>8}: {count / elapsed:.0f} req/s, {elapsed / count * 1000:.2f} ms/request, '
+            f'{len(queries)} queries/request'
+        )
@@ -0,0 +1,65 @@
+import random
+import time
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from core.bench import rolled_back, time_calls
+from core.models import User, lower_equals
+
+
+class Command(BaseCommand):
+    help = (
+        'Time the login user lookup (lower() indexes vs __iexact) as the user table grows '
+        '(synthetic users, rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,100000,1000000',
+                            help='Comma separated user counts to measure at, e.g. 1000,100000,10000000')
+        parser.add_argument('--lookups', type=int, default=200, help='Logins timed per strategy and size')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        rng = random.Random(options['seed'])
+        # Hashing is deliberately slow and the same at any table size: time the lookup only
+        password = make_password(None)
+
+        with rolled_back():
+            count = 0
+            for size in sizes:
+                self.populate(count, size, password)
+                count = size
+                logins = [self.login(rng.randrange(size), rng) for _ in range(options['lookups'])]
+                self.stdout.write(f'{size} users:')
+                self.report('lower()', logins, lambda login: User.objects.filter(
+                    lower_equals('username', login) | lower_equals('email', login)
+                ).first())
+                self.report('iexact', logins, lambda login: User.objects.filter(
+                    Q(username__iexact=login) | Q(email__iexact=login)
+                ).first())
+
+    def login(self, index, rng):
+        """Username or email of an existing user, in random case"""
+        login = f'bench-user-{index}' if rng.random() < 0.5 else f'bench-user-{index}@example.com'
+        return login.upper() if rng.random() < 0.5 else login
+
+    def populate(self, start, end, password):
+        started = time.perf_counter()
+        for first in range(start, end, 10_000):
+            User.objects.bulk_create([
+                User(username=f'bench-user-{i}', email=f'bench-user-{i}@example.com', password=password)
+                for i in range(first, min(first + 10_000, end))
+            ])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_user')
+        self.stdout.write(f'Inserted {end - start} users in {time.perf_counter() - started:.1f}s')
+
+    def report(self, label, logins, lookup):
+        def find(login):
+            assert lookup(login) is not None
+
+        median, p95 = time_calls(find, logins)
+        self.stdout.write(f'  {label:>8}: median {median:.2f} ms, p95 {p95:.2f} ms')
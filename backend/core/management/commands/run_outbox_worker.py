@@ -0,0 +1,33 @@
+import signal
+import time
+from django.core.management.base import BaseCommand
+from core.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = 'Process outbox events until stopped; run several for parallel consumers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Events claimed per transaction')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain what is due now and exit')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processed = 0
+        while self.running:
+            count = process_batch(batch_size=options['batch_size'])
+            processed += count
+            if not count:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} outbox events'))
+
+    def stop(self, signum, frame):
+        """Finish the current batch, then exit"""
+        self.running = False
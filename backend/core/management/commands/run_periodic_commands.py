@@ -0,0 +1,42 @@
+import logging
+import signal
+import time
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run the PERIODIC_COMMANDS maintenance commands on their intervals until stopped; run only one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every command once and exit')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        due = {name: 0 for name, _ in settings.PERIODIC_COMMANDS}
+        while self.running:
+            for name, interval in settings.PERIODIC_COMMANDS:
+                if not self.running or time.monotonic() < due[name]:
+                    continue
+                due[name] = time.monotonic() + interval
+                try:
+                    call_command(name, stdout=self.stdout, stderr=self.stderr)
+                except Exception:
+                    # A failing command must not stop the others; it runs again next interval
+                    logger.exception('Periodic command %s failed', name)
+            if options['once']:
+                break
+            # Drop connections past CONN_MAX_AGE or broken by a database restart, like after a request
+            close_old_connections()
+            time.sleep(1)
+
+    def stop(self, signum, frame):
+        """Finish the running command, then exit"""
+        self.running = False
@@ -1,5 +1,16 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from django.utils import timezone
+
+
+def lower_equals(field, value):
+    """
+    Case-insensitive match on a User field that the lower() indexes can
+    serve; __iexact compiles to UPPER() on PostgreSQL and scans the table.
+    """
+    return Exact(Lower(field), value.lower())
 
 
 class User(AbstractUser):
@@ -16,6 +27,38 @@ class User(AbstractUser):
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
+        indexes = [
+            # Case-insensitive login and registration lookups (see lower_equals)
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
     
     def __str__(self):
         return self.username
+
+
+class OutboxEvent(models.Model):
+    """
+    Work to do after a transaction commits, written in that transaction.
+    Drained by the run_outbox_worker command (see core.outbox).
+    """
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    available_at = models.DateTimeField(default=timezone.now)  # Pushed back after a failed attempt
+    failed_at = models.DateTimeField(null=True, blank=True)  # Set once attempts run out
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(
+                fields=['available_at', 'id'],
+                name='outbox_pending_idx',
+                condition=models.Q(failed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} #{self.id}"
@@ -0,0 +1,97 @@
+"""
+Transactional outbox.
+
+publish() writes an OutboxEvent in the caller's transaction, so an event
+exists exactly when the change that caused it was committed. Workers
+(manage.py run_outbox_worker) claim batches with SELECT ... FOR UPDATE
+SKIP LOCKED, so several can run side by side without taking the same
+event, and call the handlers registered for each event type.
+
+Delivery is at least once: a handler may see an event again if its worker
+dies before committing, so handlers must tolerate repeats.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+_handlers = defaultdict(list)
+
+
+def handler(event_type):
+    """Register a function(payload) to run for every event of event_type"""
+    def decorator(func):
+        _handlers[event_type].append(func)
+        return func
+    return decorator
+
+
+def publish(event_type, payload):
+    """Queue an event; call inside the transaction that makes the change"""
+    return OutboxEvent.objects.create(event_type=event_type, payload=payload)
+
+
+def publish_many(event_type, payloads):
+    """Queue one event per payload with a single INSERT"""
+    return OutboxEvent.objects.bulk_create(
+        [OutboxEvent(event_type=event_type, payload=payload) for payload in payloads]
+    )
+
+
+def retry_delay(attempts):
+    """Exponential backoff, capped at an hour"""
+    return timedelta(seconds=min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), 3600))
+
+
+def dispatch(event):
+    handlers = _handlers.get(event.event_type)
+    if not handlers:
+        logger.warning('No outbox handler for %s, dropping event %s', event.event_type, event.id)
+    for func in handlers or ():
+        func(event.payload)
+
+
+@transaction.atomic
+def process_batch(batch_size=100):
+    """
+    Claim up to batch_size due events, run their handlers and delete the
+    ones that succeeded. Failures are retried with backoff until
+    OUTBOX_MAX_ATTEMPTS, then parked with failed_at set.
+    Returns the number of events claimed.
+    """
+    now = timezone.now()
+    events = list(
+        OutboxEvent.objects.select_for_update(skip_locked=True)
+        .filter(failed_at__isnull=True, available_at__lte=now)
+        .order_by('id')[:batch_size]
+    )
+
+    done = []
+    failed = []
+    for event in events:
+        try:
+            # Savepoint: a failing handler's writes are undone without losing the batch
+            with transaction.atomic():
+                dispatch(event)
+        except Exception as e:
+            logger.exception('Outbox event %s (%s) failed', event.id, event.event_type)
+            event.attempts += 1
+            event.last_error = repr(e)
+            if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+                event.failed_at = now
+            else:
+                event.available_at = now + retry_delay(event.attempts)
+            failed.append(event)
+        else:
+            done.append(event.id)
+
+    if done:
+        OutboxEvent.objects.filter(id__in=done).delete()
+    if failed:
+        OutboxEvent.objects.bulk_update(failed, ['attempts', 'last_error', 'available_at', 'failed_at'])
+    return len(events)
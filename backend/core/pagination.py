@@ -0,0 +1,112 @@
+import base64
+from datetime import datetime
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a (timestamp, id) key, newest first.
+    Every page is an index range scan starting right after the previous
+    page's last row, so page 1000 costs the same as page 1 - unlike
+    OFFSET pagination, which has to walk past every skipped row.
+    Response: { next, previous, results }
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    timestamp_field = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request, queryset)
+
+        field = self.timestamp_field
+        reverse = False
+        if position:
+            timestamp, pk, reverse = position
+            # The leading range condition lets the (.., timestamp, id) index drive the scan
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gte': timestamp}) & (Q(**{f'{field}__gt': timestamp}) | Q(pk__gt=pk))
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lte': timestamp}) & (Q(**{f'{field}__lt': timestamp}) | Q(pk__lt=pk))
+                )
+
+        ordering = (field, 'pk') if reverse else (f'-{field}', '-pk')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def decode_cursor(self, request, queryset):
+        """Return (timestamp, pk, reverse) or None for the first page; pk is checked against the model's key type"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            timestamp, pk, reverse = raw.split('|')
+            return datetime.fromisoformat(timestamp), queryset.model._meta.pk.to_python(pk), reverse == '1'
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        raw = f'{getattr(row, self.timestamp_field).isoformat()}|{row.pk}|{int(reverse)}'
+        encoded = base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
+from .models import lower_equals
 
 User = get_user_model()
 
@@ -33,13 +34,13 @@ class RegisterSerializer(serializers.ModelSerializer):
     
     def validate_email(self, value):
         """Check if email is already registered."""
-        if User.objects.filter(email__iexact=value).exists():
+        if User.objects.filter(lower_equals('email', value)).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         return value.lower()
     
     def validate_username(self, value):
         """Check if username is already taken."""
-        if User.objects.filter(username__iexact=value).exists():
+        if User.objects.filter(lower_equals('username', value)).exists():
             raise serializers.ValidationError("This username is already taken.")
         return value
     
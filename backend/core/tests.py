@@ -1,3 +1,95 @@
+import base64
+import io
+import uuid
+from decimal import Decimal
+from unittest import mock
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.bench import rolled_back, time_calls
+from core.models import User
+from orders.checkout import CheckoutError, checkout_cart
+from orders.models import Cart, CartItem, Order, StockReservation
+from orders.reservations import reserve_stock
+from shop.models import Product
 
-# Create your tests here.
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('shopper', 'shopper@example.com', 'unused'))
+
+    def cursor(self, raw):
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def test_cursor_with_invalid_pk_is_not_found(self):
+        cursor = self.cursor('2020-01-01T00:00:00+00:00|abc|0')
+        for url in ('/api/products/', '/api/orders/'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url, {'cursor': cursor}).status_code, 404)
+
+    def test_undecodable_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/api/products/', {'cursor': 'not-a-cursor'}).status_code, 404)
+
+
+class IdempotencyTests(TestCase):
+    """Checkout with an Idempotency-Key: the first result is replayed, conflicts are not"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        product = Product.objects.create(name='Product', description='', price=Decimal('5.00'), stock_quantity=10)
+        CartItem.objects.create(cart=Cart.objects.create(user=self.user), product=product, quantity=1)
+        self.key = uuid.uuid4().hex
+
+    def checkout(self):
+        return self.client.post('/api/orders/checkout/', HTTP_IDEMPOTENCY_KEY=self.key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.checkout()
+        self.assertEqual(first.status_code, 201)
+        retry = self.checkout()
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_retry_after_conflict_runs_again(self):
+        conflict = CheckoutError('Stock changed during checkout, please try again', status.HTTP_409_CONFLICT)
+        with mock.patch('orders.views.checkout_cart', side_effect=conflict):
+            self.assertEqual(self.checkout().status_code, 409)
+        with mock.patch('orders.views.checkout_cart', side_effect=checkout_cart) as checkout:
+            retry = self.checkout()
+        checkout.assert_called_once()
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', retry)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class PeriodicCommandsTests(TestCase):
+    def test_once_runs_every_command(self):
+        user = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        product = Product.objects.create(name='Product', description='', price=Decimal('5.00'), stock_quantity=10)
+        reserve_stock(Cart.objects.create(user=user), product, 3)
+        StockReservation.objects.update(expires_at='2020-01-01T00:00:00Z')
+
+        call_command('run_periodic_commands', once=True, stdout=io.StringIO())
+        self.assertFalse(StockReservation.objects.exists())
+        product.refresh_from_db()
+        self.assertEqual(product.reserved_quantity, 0)
+
+
+class BenchHelperTests(TestCase):
+    def test_rolled_back_discards_writes(self):
+        with rolled_back():
+            User.objects.create_user('synthetic', 'synthetic@example.com', 'unused')
+            self.assertTrue(User.objects.filter(username='synthetic').exists())
+        self.assertFalse(User.objects.filter(username='synthetic').exists())
+
+    def test_time_calls_warms_up_then_times_each_input(self):
+        calls = []
+        median, p95 = time_calls(calls.append, [1, 2, 3])
+        self.assertEqual(calls, [1, 1, 2, 3])
+        self.assertLessEqual(median, p95)
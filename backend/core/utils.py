@@ -0,0 +1,33 @@
+from datetime import datetime, time
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 datetime, or a date meaning midnight of that day,
+    into an aware datetime. Returns None when the value is not valid.
+    """
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        return None
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+# Cache backends whose data lives inside one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every process (Redis, Memcached, files, database)"""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
@@ -33,7 +33,7 @@ class OrderItemInline(admin.TabularInline):
     """Inline admin for OrderItems"""
     model = OrderItem
     extra = 0
-    readonly_fields = ['product', 'price_at_purchase']
+    readonly_fields = ['product', 'product_name', 'price_at_purchase']
 
 
 @admin.register(Order)
@@ -50,8 +50,8 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     """Admin interface for OrderItem model"""
-    list_display = ['id', 'order', 'product', 'price_at_purchase', 'quantity']
+    list_display = ['id', 'order', 'product_name', 'price_at_purchase', 'quantity']
     list_filter = ['order__status', 'order__created_at']
-    search_fields = ['product__name', 'order__user__username']
+    search_fields = ['product_name', 'order__user__username']
     readonly_fields = ['price_at_purchase']
     ordering = ['id']
@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+CART_STORES = ('database', 'cache')
 
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'orders'
+
+    def ready(self):
+        from . import handlers  # noqa: F401
+        from core.utils import cache_is_shared
+
+        if settings.CART_STORE not in CART_STORES:
+            raise ImproperlyConfigured(f'CART_STORE must be one of: {", ".join(CART_STORES)}')
+        # The cart lock and dirty journal must be seen by every process
+        if settings.CART_STORE == 'cache' and not cache_is_shared():
+            raise ImproperlyConfigured(
+                'CART_STORE=cache needs a cache shared by every process; '
+                f'{settings.CACHES["default"]["BACKEND"]} is private to each one'
+            )
@@ -0,0 +1,198 @@
+import functools
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import DecimalField, Exists, ExpressionWrapper, F, OuterRef, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce, Now
+from rest_framework import status
+from .models import Cart, CartItem, StockReservation
+from .reservations import lock_cart_holds, reserve_many
+from shop.models import Product
+
+CART_OPERATIONS = ('add', 'set', 'remove')
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+class CartError(Exception):
+    """Raised when a batch of cart operations is invalid"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def cart_for_response(user):
+    """
+    The user's cart ready for CartSerializer in a fixed number of queries,
+    whatever its size: the cart with its total summed in SQL, its lines
+    with their products and subtotals, and the products' stripes.
+    Creates the cart on first use.
+    """
+    lines = CartItem.objects.select_related('product').prefetch_related('product__stripes').annotate(
+        subtotal=ExpressionWrapper(F('quantity') * F('product__price'), output_field=MONEY)
+    )
+    carts = Cart.objects.filter(user=user).annotate(
+        total=Coalesce(
+            Sum(F('items__quantity') * F('items__product__price'), output_field=MONEY),
+            Value(Decimal('0.00')),
+            output_field=MONEY
+        )
+    ).prefetch_related(Prefetch('items', queryset=lines))
+    cart = carts.first()
+    if cart is None:
+        Cart.objects.get_or_create(user=user)
+        cart = carts.first()
+    return cart
+
+
+def lock_cart(user_id):
+    """
+    The user's cart, created on first use, with its row locked until the
+    transaction ends. delete_stale_carts skips locked carts, so lines and
+    holds written meanwhile never point at a deleted cart; a cart deleted
+    just before the lock is taken is re-created.
+    """
+    carts = Cart.objects.select_for_update(no_key=True).filter(user_id=user_id)
+    cart = carts.first()
+    if cart is None:
+        Cart.objects.get_or_create(user_id=user_id)
+        cart = carts.get()
+    return cart
+
+
+def locks_cart(handler):
+    """Run a view handler that changes cart lines in a transaction holding lock_cart's lock"""
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        with transaction.atomic():
+            lock_cart(request.user.pk)
+            return handler(self, request, *args, **kwargs)
+    return wrapper
+
+
+def touch_cart(cart_id):
+    """Record a change to a cart's lines; they are written without saving the Cart row"""
+    Cart.objects.filter(pk=cart_id).update(last_modified=Now())
+
+
+def parse_operations(operations):
+    """Validate [{op, product_id, quantity}] and return it as (op, product_id, quantity) tuples"""
+    if not isinstance(operations, list) or not operations:
+        raise CartError('operations must be a non-empty list')
+
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in CART_OPERATIONS:
+            raise CartError(f'Operation {index}: op must be one of {", ".join(CART_OPERATIONS)}')
+        try:
+            product_id = int(operation.get('product_id'))
+            quantity = int(operation.get('quantity', 1 if operation['op'] == 'add' else 0))
+        except (TypeError, ValueError):
+            raise CartError(f'Operation {index}: product_id and quantity must be integers')
+        if quantity < 0 or (operation['op'] == 'add' and quantity == 0):
+            minimum = 1 if operation['op'] == 'add' else 0
+            raise CartError(f'Operation {index}: quantity must be at least {minimum}')
+        parsed.append((operation['op'], product_id, quantity))
+    return parsed
+
+
+def resolve_quantities(current, operations):
+    """
+    Run parsed operations in order against {product_id: quantity} and return
+    the new quantity of every touched line, 0 meaning removed. So
+    [set 1, add 2] leaves 3, and set 0 is the same as remove.
+    """
+    quantities = {}
+    for op, product_id, quantity in operations:
+        line = quantities.get(product_id, current.get(product_id, 0))
+        if op == 'add':
+            quantities[product_id] = line + quantity
+        elif op == 'set':
+            quantities[product_id] = quantity
+        else:
+            quantities[product_id] = 0
+
+    # Lines that do not exist and stay empty need no product at all
+    return {pid: quantity for pid, quantity in quantities.items() if quantity or pid in current}
+
+
+def load_products(quantities):
+    """
+    Fetch the products of the touched lines with one id__in query.
+    Raises CartError when a line would hold a missing or inactive product.
+    """
+    products = Product.objects.filter(id__in=quantities).prefetch_related('stripes').in_bulk()
+    unavailable = sorted(
+        pid for pid, quantity in quantities.items()
+        if quantity and (pid not in products or not products[pid].is_active)
+    )
+    if unavailable:
+        raise CartError(
+            f'Product not found or inactive: {", ".join(map(str, unavailable))}',
+            status.HTTP_404_NOT_FOUND
+        )
+    return products
+
+
+@transaction.atomic
+def apply_cart_operations(user, operations):
+    """
+    Apply add/set/remove operations to the user's cart in one transaction.
+    Products are validated with one id__in query, stock holds are taken in
+    bulk and cart lines are written with one upsert and one delete.
+    The cart row is locked first, then locks follow checkout's order:
+    holds, cart lines, then products.
+    """
+    operations = parse_operations(operations)
+
+    cart = lock_cart(user.pk)
+    lock_cart_holds(cart)
+    current = dict(
+        CartItem.objects.select_for_update()
+        .filter(cart=cart)
+        .values_list('product_id', 'quantity')
+    )
+    quantities = resolve_quantities(current, operations)
+    products = load_products(quantities)
+
+    # Lines whose product was deleted meanwhile are already gone (cascade)
+    quantities = {pid: quantity for pid, quantity in quantities.items() if pid in products}
+    reserve_many(cart, products, quantities)
+    save_cart_lines(cart.pk, quantities)
+    touch_cart(cart.pk)
+    return cart
+
+
+def save_cart_lines(cart_id, quantities):
+    """Upsert the lines with a quantity and delete the ones set to 0"""
+    CartItem.objects.bulk_create(
+        [CartItem(cart_id=cart_id, product_id=pid, quantity=quantity) for pid, quantity in quantities.items() if quantity],
+        update_conflicts=True,
+        unique_fields=['cart', 'product'],
+        update_fields=['quantity'],
+    )
+    removed = [pid for pid, quantity in quantities.items() if not quantity]
+    if removed:
+        CartItem.objects.filter(cart_id=cart_id, product_id__in=removed).delete()
+
+
+def delete_stale_carts(cutoff, batch_size=1000):
+    """
+    Delete one batch of carts not modified since cutoff, with their lines,
+    in one short transaction. Carts still holding stock are left to the
+    reservation sweeper first, and carts locked by a live request (see
+    lock_cart) are skipped. Returns (user ids of the deleted carts, rows
+    deleted).
+    """
+    with transaction.atomic():
+        stale = list(
+            Cart.objects.select_for_update(skip_locked=True)
+            .filter(last_modified__lt=cutoff)
+            .exclude(Exists(StockReservation.objects.filter(cart=OuterRef('pk'))))
+            .order_by('last_modified')
+            .values_list('id', 'user_id')[:batch_size]
+        )
+        if not stale:
+            return [], 0
+        deleted, _ = Cart.objects.filter(id__in=[cart_id for cart_id, _ in stale]).delete()
+    return [user_id for _, user_id in stale], deleted
@@ -0,0 +1,277 @@
+"""
+Optional cache-backed cart, enabled with CART_STORE = 'cache'.
+
+The live cart of each user is kept in the cache as its serialized lines,
+each with a snapshot of its product, so loading the cart page does not
+touch the database. Stock holds are still taken in the database on every
+change; only the CartItem rows are written behind, before checkout (and
+the other endpoints that work on CartItem rows) or by the flush_carts
+command.
+
+The cache must be shared by every web process (Redis or Memcached in
+production, a file cache in development); OrdersConfig refuses to start
+with a per-process cache such as local memory. A cart evicted
+before it is flushed loses its unflushed changes, so keep
+CART_CACHE_TIMEOUT well above the flush_carts interval and size the cache
+so that carts are not evicted.
+"""
+import functools
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from .cart import (
+    CartError, cart_for_response, load_products, lock_cart, parse_operations, resolve_quantities, save_cart_lines,
+    touch_cart
+)
+from .models import CartItem
+from .reservations import reserve_many
+from .serializers import CartSerializer
+from shop.models import Product
+from shop.serializers import ProductSerializer
+
+JOURNAL_SEQUENCE_KEY = 'cart:journal:seq'
+JOURNAL_CURSOR_KEY = 'cart:journal:cursor'
+
+
+def uses_cart_cache():
+    return settings.CART_STORE == 'cache'
+
+
+def cart_key(user_id):
+    return f'cart:{user_id}'
+
+
+@contextmanager
+def cart_lock(user_id):
+    """
+    Serialize changes to one user's cached cart across processes.
+    Raises CartError (409) when another change holds the lock for too long.
+    """
+    lock_key = f'{cart_key(user_id)}:lock'
+    timeout = settings.CART_LOCK_TIMEOUT
+    deadline = time.monotonic() + timeout
+    while not cache.add(lock_key, 1, timeout=timeout):
+        if time.monotonic() >= deadline:
+            raise CartError('The cart is being updated, try again', status.HTTP_409_CONFLICT)
+        time.sleep(0.02)
+    try:
+        yield
+    finally:
+        cache.delete(lock_key)
+
+
+def load_state(user):
+    """Build the cached state of a user's cart from the database"""
+    data = CartSerializer(cart_for_response(user)).data
+    return {
+        'id': data['id'],
+        'created_at': data['created_at'],
+        'lines': [dict(line) for line in data['items']],
+        'priced_at': time.time(),
+        'dirty': False,
+    }
+
+
+def get_state(user, lock=False):
+    """
+    Cached state of the user's cart, loaded on a miss. Readers use
+    cache.add so they never overwrite a change made meanwhile; callers
+    holding the cart lock pass lock=True.
+    """
+    state = cache.get(cart_key(user.pk))
+    if state is None:
+        state = load_state(user)
+        if lock:
+            save_state(user.pk, state)
+        elif not cache.add(cart_key(user.pk), state, timeout=settings.CART_CACHE_TIMEOUT):
+            state = cache.get(cart_key(user.pk), state)
+    return state
+
+
+def save_state(user_id, state):
+    cache.set(cart_key(user_id), state, timeout=settings.CART_CACHE_TIMEOUT)
+
+
+def cart_line(line_id, product, quantity):
+    """A cached line in CartItemSerializer's shape, priced from the product snapshot"""
+    return {'id': line_id, 'product': product, 'quantity': quantity, 'subtotal': Decimal(product['price']) * quantity}
+
+
+def refresh_snapshots(state):
+    """Re-read the products of every line with one query; lines of deleted products are dropped"""
+    ids = [line['product']['id'] for line in state['lines']]
+    products = Product.objects.filter(id__in=ids).prefetch_related('stripes').in_bulk()
+    snapshots = {product['id']: dict(product) for product in ProductSerializer(products.values(), many=True).data}
+    state['lines'] = [
+        cart_line(line['id'], snapshots[line['product']['id']], line['quantity'])
+        for line in state['lines'] if line['product']['id'] in snapshots
+    ]
+    state['priced_at'] = time.time()
+
+
+def cart_data(state):
+    """The state in CartSerializer's shape, totalled from the price snapshots"""
+    return {
+        'id': state['id'],
+        'items': state['lines'],
+        'total': sum((line['subtotal'] for line in state['lines']), Decimal('0')),
+        'created_at': state['created_at'],
+    }
+
+
+def get_cart_data(user):
+    """
+    The user's cart as CartSerializer would return it. Served from the
+    cache; prices and stock are re-read once CART_SNAPSHOT_TTL has passed,
+    skipped when a change holds the lock.
+    """
+    state = get_state(user)
+    if time.time() - state['priced_at'] > settings.CART_SNAPSHOT_TTL:
+        lock_key = f'{cart_key(user.pk)}:lock'
+        if cache.add(lock_key, 1, timeout=settings.CART_LOCK_TIMEOUT):
+            try:
+                state = get_state(user, lock=True)
+                refresh_snapshots(state)
+                save_state(user.pk, state)
+            finally:
+                cache.delete(lock_key)
+    return cart_data(state)
+
+
+def mark_dirty(user_id):
+    """Append the cart to the journal read by flush_dirty_carts"""
+    cache.add(JOURNAL_SEQUENCE_KEY, 0, timeout=None)
+    sequence = cache.incr(JOURNAL_SEQUENCE_KEY)
+    cache.set(f'cart:journal:{sequence}', user_id, timeout=settings.CART_CACHE_TIMEOUT)
+
+
+def apply_operations(user, operations):
+    """
+    Cache-backed apply_cart_operations: validates and holds stock in the
+    database like it, then updates the cached lines instead of CartItem
+    rows. Returns the cart data.
+    """
+    operations = parse_operations(operations)
+    with cart_lock(user.pk):
+        state = get_state(user, lock=True)
+        lines = {line['product']['id']: line for line in state['lines']}
+        resolved = resolve_quantities(
+            {pid: line['quantity'] for pid, line in lines.items()}, operations
+        )
+        products = load_products(resolved)
+        quantities = {pid: quantity for pid, quantity in resolved.items() if pid in products}
+
+        with transaction.atomic():
+            # Re-created if it was deleted as stale since it was cached
+            cart = lock_cart(user.pk)
+            state['id'] = cart.pk
+            reserve_many(cart, products, quantities)
+
+        snapshots = {
+            product['id']: dict(product)
+            for product in ProductSerializer([products[pid] for pid in quantities], many=True).data
+        }
+        added = []
+        for pid, quantity in resolved.items():
+            if not quantity or pid not in products:
+                lines.pop(pid, None)
+            elif pid in lines:
+                lines[pid] = cart_line(lines[pid]['id'], snapshots[pid], quantity)
+            else:
+                added.append(cart_line(None, snapshots[pid], quantity))
+        # Newest first, like CartItem's ordering
+        state['lines'] = added[::-1] + [
+            lines[line['product']['id']] for line in state['lines'] if line['product']['id'] in lines
+        ]
+
+        if not state['dirty']:
+            state['dirty'] = True
+            mark_dirty(user.pk)
+        save_state(user.pk, state)
+    return cart_data(state)
+
+
+def write_lines(user_id, state):
+    """
+    Make the CartItem rows match the cached lines and record their ids.
+    Must run inside a transaction; the cart row stays locked until it ends.
+    """
+    state['id'] = lock_cart(user_id).pk
+    quantities = {line['product']['id']: line['quantity'] for line in reversed(state['lines'])}
+    CartItem.objects.filter(cart_id=state['id']).exclude(product_id__in=quantities).delete()
+    save_cart_lines(state['id'], quantities)
+    touch_cart(state['id'])
+    ids = dict(CartItem.objects.filter(cart_id=state['id']).values_list('product_id', 'id'))
+    for line in state['lines']:
+        line['id'] = ids.get(line['product']['id'])
+    state['dirty'] = False
+
+
+def flush_cart(user_id):
+    """Write one cached cart back to the database. Returns True when it had changes."""
+    with cart_lock(user_id):
+        state = cache.get(cart_key(user_id))
+        if not state or not state['dirty']:
+            return False
+        with transaction.atomic():
+            write_lines(user_id, state)
+        save_state(user_id, state)
+    return True
+
+
+def flush_dirty_carts():
+    """
+    Flush every cart changed since the last run, following the journal
+    written by mark_dirty. Returns the number of carts written.
+    """
+    last = cache.get(JOURNAL_SEQUENCE_KEY) or 0
+    first = (cache.get(JOURNAL_CURSOR_KEY) or 0) + 1
+    flushed = 0
+    for start in range(first, last + 1, 500):
+        keys = [f'cart:journal:{sequence}' for sequence in range(start, min(start + 500, last + 1))]
+        for user_id in set(cache.get_many(keys).values()):
+            flushed += flush_cart(user_id)
+        cache.delete_many(keys)
+        cache.set(JOURNAL_CURSOR_KEY, start + len(keys) - 1, timeout=None)
+    return flushed
+
+
+@contextmanager
+def flushed(user):
+    """
+    Flush the user's cached cart, then drop it from the cache once the
+    block has run, so code working on CartItem rows sees every change and
+    the next read reloads what it did. A no-op unless the cache store is on.
+    """
+    if not uses_cart_cache():
+        yield
+        return
+    with cart_lock(user.pk):
+        state = cache.get(cart_key(user.pk))
+        if state and state['dirty']:
+            with transaction.atomic():
+                write_lines(user.pk, state)
+        try:
+            yield
+        finally:
+            cache.delete(cart_key(user.pk))
+
+
+def flushes_cart(handler):
+    """
+    Run a view handler that works on CartItem rows (by id, or at checkout)
+    inside flushed(), answering 409 when the cart is locked too long.
+    """
+    @functools.wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        try:
+            with flushed(request.user):
+                return handler(self, request, *args, **kwargs)
+        except CartError as e:
+            return Response({'error': e.message}, status=e.status_code)
+    return wrapper
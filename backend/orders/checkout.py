@@ -0,0 +1,159 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
+from rest_framework import status
+from .models import CartItem, Order, OrderItem, StockReservation
+from .handlers import ORDER_CREATED
+from .reservations import adjust_reserved, held_by_others, lock_cart_holds, release_expired_holds
+from core.outbox import publish
+from shop.cache import bump_catalog_version
+from shop.inventory import take_from_stripes
+from shop.models import Product
+
+
+class CheckoutError(Exception):
+    """Raised when a cart cannot be turned into an order"""
+
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def lock_cart_lines(cart):
+    """
+    Load every cart line together with its product and lock them.
+    Plain product rows are locked in id order so concurrent checkouts always
+    acquire their locks in the same order. Striped products are not locked
+    here; their stripes are picked and locked one at a time at decrement.
+    """
+    cart_items = list(
+        CartItem.objects.filter(cart=cart)
+        .select_related('product')
+        .prefetch_related('product__stripes')
+        .select_for_update(of=('self',))
+        .order_by('product_id')
+    )
+
+    plain_ids = [item.product_id for item in cart_items if not item.product.is_striped]
+    if plain_ids:
+        locked = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(id__in=plain_ids).order_by('id')
+        }
+        for item in cart_items:
+            if item.product_id in locked:
+                item.product = locked[item.product_id]
+    return cart_items
+
+
+def decrement_stock(quantities, held=None):
+    """
+    Deduct stock for many products with one conditional UPDATE, confirming
+    any holds the cart had on them at the same time.
+    quantities: {product_id: quantity}
+    held: {product_id: quantity reserved by this cart}
+    Returns True only if every product still had enough unreserved stock.
+    """
+    if not quantities:
+        return True
+    held = held or {}
+
+    in_stock = Q()
+    for product_id, quantity in quantities.items():
+        in_stock |= Q(
+            id=product_id,
+            stock_quantity__gte=F('reserved_quantity') + (quantity - held.get(product_id, 0))
+        )
+
+    updated = Product.objects.filter(in_stock).update(
+        stock_quantity=F('stock_quantity') - Case(
+            *[When(id=product_id, then=quantity) for product_id, quantity in quantities.items()]
+        ),
+        reserved_quantity=F('reserved_quantity') - Case(
+            *[When(id=product_id, then=held.get(product_id, 0)) for product_id in quantities],
+            default=0
+        ),
+        updated_at=Now()  # update() skips auto_now; conditional GETs rely on it
+    )
+    return updated == len(quantities)
+
+
+@transaction.atomic
+def checkout_cart(cart, user):
+    """
+    Convert a cart into an order using a fixed number of queries,
+    whatever the number of lines in the cart.
+    Stock already held for the cart counts towards what it may buy.
+    """
+    held = lock_cart_holds(cart)
+    cart_items = lock_cart_lines(cart)
+
+    if not cart_items:
+        raise CheckoutError('Cart is empty')
+
+    # Other carts' expired holds do not count against what this one may buy
+    short = [
+        item for item in cart_items
+        if not item.product.is_striped and item.quantity > item.product.available_quantity + held.get(item.product_id, 0)
+    ]
+    released = release_expired_holds(cart, [item.product_id for item in short])
+    for item in short:
+        item.product.reserved_quantity -= released.get(item.product_id, 0)
+
+    # Validate stock availability for all items
+    others = held_by_others(cart, [item.product_id for item in cart_items if item.product.is_striped])
+    for item in cart_items:
+        if item.product.is_striped:
+            available = item.product.total_stock - others.get(item.product_id, 0)
+        else:
+            available = item.product.available_quantity + held.get(item.product_id, 0)
+        if available < item.quantity:
+            raise CheckoutError(
+                f'Insufficient stock for {item.product.name}. '
+                f'Available: {max(available, 0)}, Requested: {item.quantity}'
+            )
+
+    total = sum(item.product.price * item.quantity for item in cart_items)
+
+    order = Order.objects.create(
+        user=user,
+        status='PENDING',
+        total_amount=total
+    )
+
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product=item.product,
+            price_at_purchase=item.product.price,  # CRITICAL: Save price snapshot
+            quantity=item.quantity,
+            order_created_at=order.created_at,
+            **OrderItem.snapshot(item.product)
+        )
+        for item in cart_items
+    ])
+
+    quantities = {item.product_id: item.quantity for item in cart_items if not item.product.is_striped}
+    in_stock = decrement_stock(quantities, held) and all(
+        take_from_stripes(item.product_id, item.quantity)
+        for item in cart_items if item.product.is_striped
+    )
+    if not in_stock:
+        # Raising rolls back the order and its items
+        raise CheckoutError('Stock changed during checkout, please try again', status.HTTP_409_CONFLICT)
+
+    # Holds left over from lines that are no longer in the cart
+    adjust_reserved({product_id: -quantity for product_id, quantity in held.items() if product_id not in quantities})
+
+    # Clear cart and its holds
+    CartItem.objects.filter(cart=cart).delete()
+    StockReservation.objects.filter(cart=cart).delete()
+
+    # Stock levels are part of the cached catalog
+    transaction.on_commit(bump_catalog_version)
+
+    # Follow-up work (confirmation email, ...) runs in the outbox worker, outside this transaction
+    publish(ORDER_CREATED, {'order_id': str(order.id), 'user_id': user.pk})
+
+    return order
@@ -0,0 +1,82 @@
+"""
+Streaming export of orders, one row per order line.
+
+Rows come from a single flat values_list() query read through
+.iterator(chunk_size), a server-side cursor on PostgreSQL, and are encoded
+a chunk at a time, so memory use does not grow with the date range.
+"""
+import csv
+import io
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import OrderItem
+
+EXPORT_FIELDS = [
+    ('order_id', 'order_id'),
+    ('created_at', 'order__created_at'),
+    ('status', 'order__status'),
+    ('user_id', 'order__user_id'),
+    ('username', 'order__user__username'),
+    ('order_total', 'order__total_amount'),
+    ('line_id', 'id'),
+    ('product_id', 'product_id'),
+    ('product_name', 'product_name'),
+    ('quantity', 'quantity'),
+    ('price_at_purchase', 'price_at_purchase'),
+]
+
+CREATED_AT = [name for name, _ in EXPORT_FIELDS].index('created_at')
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def order_lines(orders, chunk_size=2000):
+    """
+    Yield a tuple per line of the given orders, oldest order first, with
+    created_at already in ISO 8601 so that every format writes it the same way
+    """
+    rows = (
+        OrderItem.objects.filter(order__in=orders.values('id'))
+        .order_by('order__created_at', 'order_id', 'id')
+        .values_list(*[lookup for _, lookup in EXPORT_FIELDS])
+        .iterator(chunk_size=chunk_size)
+    )
+    return (row[:CREATED_AT] + (row[CREATED_AT].isoformat(),) + row[CREATED_AT + 1:] for row in rows)
+
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def encode_csv(rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_FIELDS])
+    yield buffer.getvalue()
+    for chunk in chunked(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def encode_jsonl(rows, chunk_size):
+    names = [name for name, _ in EXPORT_FIELDS]
+    encoder = DjangoJSONEncoder()
+    for chunk in chunked(rows, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(names, row))) + '\n' for row in chunk)
+
+
+def export_orders(orders, fmt, chunk_size=2000):
+    """Yield the export of an Order queryset as text chunks in 'csv' or 'jsonl'"""
+    encode = encode_csv if fmt == 'csv' else encode_jsonl
+    return encode(order_lines(orders, chunk_size), chunk_size)
@@ -0,0 +1,55 @@
+from rest_framework.exceptions import ValidationError
+from core.utils import parse_timestamp
+from .models import Order
+
+FILTER_KEYS = ('status', 'created_after', 'created_before', 'user')
+
+
+def filter_orders(queryset, params, strict=False):
+    """
+    Apply the admin ?status=, ?created_after=, ?created_before= and ?user=
+    filters. Raises ValidationError listing every invalid parameter.
+    With strict=True (JSON filters that select orders to change) unknown
+    keys and empty or null values are rejected too, and at least one filter
+    is required, so a typo cannot widen the selection to every order.
+    """
+    errors = {}
+
+    if strict:
+        for key, value in params.items():
+            if key not in FILTER_KEYS:
+                errors[key] = f'Unknown filter, expected one of: {", ".join(FILTER_KEYS)}'
+            elif not value or (isinstance(value, str) and not value.strip()):
+                errors[key] = 'This filter may not be empty.'
+        if not params:
+            errors['filter'] = f'Provide at least one of: {", ".join(FILTER_KEYS)}'
+    for key in ('status', 'created_after', 'created_before'):
+        if params.get(key) and not isinstance(params[key], str):
+            errors[key] = 'Expected a string.'
+
+    if params.get('status') and 'status' not in errors:
+        statuses = params['status'].split(',')
+        invalid = set(statuses) - set(dict(Order.STATUS_CHOICES))
+        if invalid:
+            errors['status'] = f'Invalid status: {", ".join(sorted(invalid))}'
+        else:
+            queryset = queryset.filter(status__in=statuses)
+
+    for param, lookup in (('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')):
+        if params.get(param) and param not in errors:
+            value = parse_timestamp(params[param])
+            if value is None:
+                errors[param] = 'Expected an ISO 8601 date or datetime.'
+            else:
+                queryset = queryset.filter(**{lookup: value})
+
+    if params.get('user'):
+        if isinstance(params['user'], (str, int)) and not isinstance(params['user'], bool) \
+                and str(params['user']).isdigit():
+            queryset = queryset.filter(user_id=params['user'])
+        else:
+            errors['user'] = 'Expected a user id.'
+
+    if errors:
+        raise ValidationError(errors)
+    return queryset
@@ -0,0 +1,41 @@
+"""Outbox handlers for order events (run by run_outbox_worker, not in the request)"""
+from django.core.mail import send_mail
+from core.outbox import handler
+from .models import Order
+
+ORDER_CREATED = 'order.created'
+ORDER_STATUS_CHANGED = 'order.status_changed'
+
+
+def load_order(payload):
+    return Order.objects.select_related('user').filter(id=payload['order_id']).first()
+
+
+@handler(ORDER_CREATED)
+def send_order_confirmation(payload):
+    order = load_order(payload)
+    if order is None or not order.user.email:
+        return
+    lines = '\n'.join(
+        f'{item.quantity} x {item.product_name} @ ${item.price_at_purchase}'
+        for item in order.items.all()
+    )
+    send_mail(
+        subject=f'Order #{str(order.id)[:8]} confirmed',
+        message=f'Hi {order.user.username},\n\nThanks for your order:\n\n{lines}\n\nTotal: ${order.total_amount}\n',
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
+
+
+@handler(ORDER_STATUS_CHANGED)
+def send_status_update(payload):
+    order = load_order(payload)
+    if order is None or not order.user.email:
+        return
+    send_mail(
+        subject=f'Order #{str(order.id)[:8]} is now {dict(Order.STATUS_CHOICES)[payload["to"]].lower()}',
+        message=f'Hi {order.user.username},\n\nYour order status changed from {payload["from"]} to {payload["to"]}.\n',
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
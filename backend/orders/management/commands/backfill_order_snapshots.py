@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from orders.models import OrderItem
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the product snapshot of order lines created before snapshots existed, in batches. '
+        'Uses the products as they are now, the closest record left of how they were.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Lines updated per query')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = OrderItem.objects.filter(product_name='').select_related('product').only(
+            'id', 'product__name', 'product__image', 'product__image_variants'
+        ).order_by('id')
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Keyset on id: each batch is one short query and one short UPDATE
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            for item in batch:
+                for field, value in OrderItem.snapshot(item.product).items():
+                    setattr(item, field, value)
+            OrderItem.objects.bulk_update(batch, ['product_name', 'product_image', 'product_thumbnail'])
+            updated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'Backfilled {updated} order lines...')
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled {updated} order lines'))
@@ -0,0 +1,108 @@
+import os
+import random
+import resource
+import threading
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from core.bench import rolled_back
+from core.models import User
+from orders.export import EXPORT_FORMATS, export_orders
+from orders.models import Order, OrderItem
+from shop.models import Product
+
+
+def current_rss():
+    """Resident set size in bytes (Linux), or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+class RSSSampler(threading.Thread):
+    """Tracks the highest RSS seen while running"""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss() or 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak = max(self.peak, current_rss() or 0)
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.peak
+
+
+class Command(BaseCommand):
+    help = 'Measure time and peak RSS of the streaming order export over synthetic orders (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=5_000_000, help='Synthetic order lines to insert')
+        parser.add_argument('--lines-per-order', type=int, default=4)
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with rolled_back():
+            self.populate(rng, options['lines'], options['lines_per_order'])
+            self.run_export(options['format'], options['chunk_size'])
+
+    def populate(self, rng, lines, lines_per_order):
+        self.stdout.write(f'Inserting {lines} synthetic order lines...')
+        start = time.perf_counter()
+        user = User.objects.create_user(username=f'bench-export-{time.time_ns()}', password=None)
+        products = Product.objects.bulk_create([
+            Product(name=f'Export bench product {i}', description='', price=Decimal('9.99'), stock_quantity=0)
+            for i in range(100)
+        ])
+
+        remaining = lines
+        while remaining:
+            orders = []
+            items = []
+            for _ in range(min(2500, -(-remaining // lines_per_order))):
+                count = min(lines_per_order, remaining)
+                remaining -= count
+                order = Order(user=user, status='PAID', total_amount=Decimal('39.96'))
+                orders.append(order)
+                items.extend(
+                    OrderItem(order=order, product=rng.choice(products), price_at_purchase=Decimal('9.99'), quantity=rng.randint(1, 5))
+                    for _ in range(count)
+                )
+            Order.objects.bulk_create(orders)
+            for item in items:
+                item.order_created_at = item.order.created_at  # Set by bulk_create above
+            OrderItem.objects.bulk_create(items)
+        self.stdout.write(f'Populated in {time.perf_counter() - start:.1f}s')
+
+    def run_export(self, fmt, chunk_size):
+        before = current_rss()
+        sampler = RSSSampler()
+        sampler.start()
+        start = time.perf_counter()
+        written = 0
+        rows = 0
+        with open(os.devnull, 'w') as output:
+            for chunk in export_orders(Order.objects.all(), fmt, chunk_size):
+                output.write(chunk)
+                written += len(chunk)
+                rows += chunk.count('\n')
+        elapsed = time.perf_counter() - start
+        peak = sampler.stop()
+
+        self.stdout.write(f'Exported {rows} rows ({written / 2**20:.0f} MiB of {fmt}) in {elapsed:.1f}s')
+        if before is None:
+            # Without /proc only the process-wide high-water mark is available (KiB on Linux, bytes on macOS)
+            self.stdout.write(f'Peak RSS (process lifetime): {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}')
+        else:
+            self.stdout.write(f'RSS before export: {before / 2**20:.1f} MiB, peak during export: {peak / 2**20:.1f} MiB '
+                              f'(+{(peak - before) / 2**20:.1f} MiB)')
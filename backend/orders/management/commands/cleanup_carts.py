@@ -0,0 +1,43 @@
+import time
+from datetime import timedelta
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from orders.cart import delete_stale_carts
+from orders.cart_store import cart_key, uses_cart_cache
+
+
+class Command(BaseCommand):
+    help = 'Delete carts idle for more than --days days, in short batches (safe to run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Idle days before a cart is deleted')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Carts deleted per transaction')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        carts = rows = 0
+        start = time.perf_counter()
+        while True:
+            user_ids, deleted = delete_stale_carts(cutoff, batch_size=options['batch_size'])
+            if not user_ids:
+                break
+            if uses_cart_cache():
+                # A cached copy would point at the deleted cart
+                cache.delete_many([cart_key(user_id) for user_id in user_ids])
+            carts += len(user_ids)
+            rows += deleted
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'Deleted {carts} carts ({rows} rows, {rows / elapsed:.0f} rows/s)...')
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {carts} carts and {rows - carts} cart lines in {elapsed:.1f}s '
+            f'({rows / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
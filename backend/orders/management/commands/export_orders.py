@@ -0,0 +1,33 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from orders.export import EXPORT_FORMATS, export_orders
+from orders.filters import filter_orders
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Stream orders, one row per order line, as CSV or JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--status', help='Comma separated statuses')
+        parser.add_argument('--created-after', help='ISO date or datetime, inclusive')
+        parser.add_argument('--created-before', help='ISO date or datetime, exclusive')
+        parser.add_argument('--user', help='User id')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        try:
+            orders = filter_orders(Order.objects.all(), options)
+        except ValidationError as e:
+            raise CommandError('; '.join(f'{field}: {message}' for field, message in e.detail.items()))
+
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in export_orders(orders, options['format'], options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from orders.cart_store import flush_dirty_carts, uses_cart_cache
+
+
+class Command(BaseCommand):
+    help = 'Write carts changed in the cache back to CartItem rows (CART_STORE=cache; safe to run from cron)'
+
+    def handle(self, *args, **options):
+        if not uses_cart_cache():
+            self.stdout.write('CART_STORE is not "cache"; nothing to flush')
+            return
+        flushed = flush_dirty_carts()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {flushed} carts'))
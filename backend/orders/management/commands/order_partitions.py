@@ -0,0 +1,49 @@
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from orders.partitions import PartitionError, archive_before, convert, ensure_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Manage monthly partitions of the order tables (PostgreSQL only): convert once with --convert, '
+        'then run regularly to create future partitions and archive old ones'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Convert orders_order/orders_orderitem to the partitioned layout (one-off, locks both tables)')
+        parser.add_argument('--months-ahead', type=int, default=3, help='Future monthly partitions to keep created')
+        parser.add_argument('--archive-before', metavar='YYYY-MM',
+                            help='Detach partitions of months before this one and archive them')
+        parser.add_argument('--archive-dir', default=settings.ORDER_ARCHIVE_DIR,
+                            help='Directory for <partition>.jsonl.gz archives')
+        parser.add_argument('--detach-only', action='store_true',
+                            help='Keep detached partitions as plain tables instead of archiving and dropping them')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Order partitioning requires PostgreSQL')
+
+        archive_month = None
+        if options['archive_before']:
+            try:
+                archive_month = datetime.strptime(options['archive_before'], '%Y-%m')
+            except ValueError:
+                raise CommandError('--archive-before expects YYYY-MM')
+
+        try:
+            if options['convert']:
+                months = convert(months_ahead=options['months_ahead'])
+                self.stdout.write(self.style.SUCCESS(f'Partitioned order tables into {len(months)} months'))
+
+            created = ensure_partitions(months_ahead=options['months_ahead'])
+            self.stdout.write(f'Created {len(created)} partitions' + (f': {", ".join(created)}' if created else ''))
+
+            if archive_month:
+                handled = archive_before(archive_month, options['archive_dir'], drop=not options['detach_only'])
+                action = 'Detached' if options['detach_only'] else f'Archived to {options["archive_dir"]} and dropped'
+                self.stdout.write(self.style.SUCCESS(f'{action} {len(handled)} partitions'))
+        except PartitionError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from orders.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = 'Release expired stock reservations in batches (safe to run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Holds released per transaction')
+
+    def handle(self, *args, **options):
+        released = 0
+        while True:
+            count = release_expired(batch_size=options['batch_size'])
+            if not count:
+                break
+            released += count
+
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired reservations'))
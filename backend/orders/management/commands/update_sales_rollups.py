@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from orders.rollups import full_rebuild, update_rollups
+
+
+class Command(BaseCommand):
+    help = 'Bring the daily and per-product sales rollups up to date (safe to run from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recompute every day instead of only changed ones')
+        parser.add_argument('--chunk-days', type=int, default=31, help='Days rebuilt per transaction with --full')
+
+    def handle(self, *args, **options):
+        if options['full']:
+            days = full_rebuild(chunk_days=options['chunk_days'])
+        else:
+            days = update_rollups()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt sales rollups for {days} days'))
@@ -9,12 +9,17 @@ class Cart(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='cart')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Moved by every change to the cart's lines (see touch_cart), read by cleanup_carts
+    last_modified = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Cart for {self.user.username}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['last_modified'], name='cart_last_modified_idx'),
+        ]
 
 
 class CartItem(models.Model):
@@ -31,6 +36,22 @@ class CartItem(models.Model):
         return f"{self.quantity}x {self.product.name} in cart"
 
 
+class StockReservation(models.Model):
+    """Time-limited hold on product stock for a cart line"""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['cart', 'product']  # One hold per cart line
+        ordering = ['expires_at']
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product.name} held until {self.expires_at}"
+
+
 class Order(models.Model):
     """Order model for completed purchases"""
     STATUS_CHOICES = [
@@ -40,14 +61,31 @@ class Order(models.Model):
         ('CANCELLED', 'Cancelled'),
     ]
 
+    # Statuses an order may move to from each status
+    ALLOWED_TRANSITIONS = {
+        'PENDING': {'PAID', 'CANCELLED'},
+        'PAID': {'SHIPPED', 'CANCELLED'},
+        'SHIPPED': set(),
+        'CANCELLED': set(),
+    }
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the admin console and order history, with and without filters
+            models.Index(fields=['created_at', 'id'], name='order_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='order_status_created_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_idx'),
+            # Finds orders changed since the sales rollup watermark
+            models.Index(fields=['updated_at'], name='order_updated_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username} - {self.status}"
@@ -59,9 +97,77 @@ class OrderItem(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     price_at_purchase = models.DecimalField(max_digits=10, decimal_places=2)  # CRITICAL: Price snapshot
     quantity = models.IntegerField()
+    # Copy of order.created_at: the partition key when order tables are partitioned by month
+    order_created_at = models.DateTimeField(editable=False)
+    # Product as it was at checkout, so order reads never touch shop_product
+    product_name = models.CharField(max_length=200, blank=True)
+    product_image = models.CharField(max_length=255, blank=True)  # Storage name of the original
+    product_thumbnail = models.CharField(max_length=255, blank=True)  # Smallest JPEG variant
 
     class Meta:
         ordering = ['id']
 
+    @staticmethod
+    def snapshot(product):
+        """Snapshot fields for a line of product"""
+        jpeg = product.image_variants.get('jpeg', {})
+        return {
+            'product_name': product.name,
+            'product_image': product.image.name if product.image else '',
+            'product_thumbnail': jpeg[min(jpeg, key=int)] if jpeg else '',
+        }
+
+    def save(self, *args, **kwargs):
+        if self.order_created_at is None:
+            self.order_created_at = self.order.created_at
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_name} @ ${self.price_at_purchase}"
+
+
+class DailySales(models.Model):
+    """Sales rollup per day, maintained by the update_sales_rollups command"""
+    day = models.DateField(unique=True)
+    order_count = models.PositiveIntegerField(default=0)  # Excludes cancelled orders
+    cancelled_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['day']
+        verbose_name_plural = 'Daily sales'
+
+    def __str__(self):
+        return f"{self.day}: {self.order_count} orders, ${self.revenue}"
+
+
+class ProductDailySales(models.Model):
+    """Sales rollup per product and day, excluding cancelled orders"""
+    day = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    order_count = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['day', 'product']
+        verbose_name_plural = 'Product daily sales'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='product_daily_sales_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day'], name='product_daily_sales_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day}: {self.units}x {self.product_id}"
+
+
+class RollupWatermark(models.Model):
+    """How far a rollup has processed orders, by Order.updated_at"""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField()
+
     def __str__(self):
-        return f"{self.quantity}x {self.product.name} @ ${self.price_at_purchase}"
+        return f"{self.name} @ {self.value}"
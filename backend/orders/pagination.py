@@ -0,0 +1,8 @@
+from django.conf import settings
+from core.pagination import KeysetPagination
+
+
+class OrderCursorPagination(KeysetPagination):
+    """Keyset pagination for order history on (created_at, id)"""
+    page_size = settings.ORDER_PAGE_SIZE
+    max_page_size = settings.ORDER_MAX_PAGE_SIZE
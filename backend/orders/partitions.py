@@ -0,0 +1,267 @@
+"""
+Optional monthly range partitioning of orders_order and orders_orderitem
+(PostgreSQL only), driven by the order_partitions command.
+
+Orders are partitioned by created_at and order lines by order_created_at,
+their copy of it, so an order and its lines always share a month. Every
+partition carries its own small indexes; the current month's stay hot in
+memory while old months can be detached, archived and dropped. The ORM
+keeps using the parent tables, so queries and views do not change.
+
+Layout rules once converted:
+- primary keys become (id, <partition key>), which the ORM does not notice
+- lines reference orders through (order_id, order_created_at)
+- a DEFAULT partition catches rows outside the created months; keep future
+  partitions created ahead (order_partitions --months-ahead) so it stays empty
+"""
+import gzip
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+ORDER_TABLE = 'orders_order'
+ITEM_TABLE = 'orders_orderitem'
+# Parent table -> partition key, children before parents where order matters
+PARTITION_KEYS = {
+    ITEM_TABLE: 'order_created_at',
+    ORDER_TABLE: 'created_at',
+}
+PARTITION_NAME = re.compile(r'^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$')
+
+
+class PartitionError(Exception):
+    """Raised when the partition layout cannot be changed as asked"""
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))',
+        [table]
+    )
+    return cursor.fetchone()[0]
+
+
+def list_partitions(cursor, table):
+    """{month: partition name} for the monthly partitions of table"""
+    cursor.execute(
+        'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+        'WHERE i.inhparent = to_regclass(%s)',
+        [table]
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match and match['table'] == table:
+            partitions[datetime(int(match['year']), int(match['month']), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def create_partition(cursor, table, month, parent=None):
+    """Partition of table for one month, attached to parent (defaults to table)"""
+    start, end = month, add_months(month, 1)
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {parent or table} '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """Create the monthly partitions from the current month to months_ahead. Returns names created."""
+    current = month_start(now or datetime.now(dt_timezone.utc))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITION_KEYS:
+            if not is_partitioned(cursor, table):
+                raise PartitionError(f'{table} is not partitioned; run order_partitions --convert first')
+            existing = list_partitions(cursor, table)
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if month not in existing:
+                    create_partition(cursor, table, month)
+                    created.append(partition_name(table, month))
+    return created
+
+
+def index_definitions(cursor, table):
+    """CREATE INDEX statements of every non primary key index on table"""
+    cursor.execute(
+        'SELECT pg_get_indexdef(indexrelid), indisunique FROM pg_index '
+        'WHERE indrelid = to_regclass(%s) AND NOT indisprimary',
+        [table]
+    )
+    definitions = []
+    for definition, unique in cursor.fetchall():
+        if unique:
+            # Unique indexes on a partitioned table must include the partition key
+            raise PartitionError(f'Cannot partition {table}: unique index {definition}')
+        definitions.append(definition)
+    return definitions
+
+
+def foreign_keys(cursor, table):
+    """(name, definition) of the foreign keys declared on table"""
+    cursor.execute(
+        'SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint '
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table]
+    )
+    return cursor.fetchall()
+
+
+def convert(months_ahead=3):
+    """
+    One-off conversion of both tables to the partitioned layout, copying
+    every row. Runs in a single transaction holding exclusive locks on the
+    order tables, so schedule it in a maintenance window.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        if any(is_partitioned(cursor, table) for table in PARTITION_KEYS):
+            raise PartitionError('Order tables are already partitioned')
+        # Tables with pending deferred FK checks cannot be dropped (when called inside a larger transaction)
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        cursor.execute(
+            'SELECT conrelid::regclass::text FROM pg_constraint '
+            "WHERE contype = 'f' AND confrelid IN (to_regclass(%s), to_regclass(%s)) "
+            'AND conrelid NOT IN (to_regclass(%s), to_regclass(%s))',
+            [ORDER_TABLE, ITEM_TABLE, ORDER_TABLE, ITEM_TABLE]
+        )
+        referencing = [row[0] for row in cursor.fetchall()]
+        if referencing:
+            raise PartitionError(f'Tables reference the order tables: {", ".join(referencing)}')
+
+        indexes = {table: index_definitions(cursor, table) for table in PARTITION_KEYS}
+        # LIKE ... INCLUDING CONSTRAINTS copies no foreign keys: recreate them after the swap,
+        # except the line -> order one, which has to include the partition key
+        fks = {
+            table: [
+                (name, definition) for name, definition in foreign_keys(cursor, table)
+                if f'REFERENCES {ORDER_TABLE}(' not in definition
+            ]
+            for table in PARTITION_KEYS
+        }
+
+        cursor.execute(f'SELECT min(created_at) FROM {ORDER_TABLE}')
+        oldest = cursor.fetchone()[0]
+        current = month_start(datetime.now(dt_timezone.utc))
+        first = month_start(oldest) if oldest else current
+        months = []
+        month = first
+        while month <= add_months(current, months_ahead):
+            months.append(month)
+            month = add_months(month, 1)
+
+        for table, key in PARTITION_KEYS.items():
+            new = f'{table}_partitioned'
+            cursor.execute(
+                f'CREATE TABLE {new} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+                f'PARTITION BY RANGE ({key})'
+            )
+            cursor.execute(f'ALTER TABLE {new} ADD PRIMARY KEY (id, {key})')
+            cursor.execute(f'CREATE TABLE {table}_default PARTITION OF {new} DEFAULT')
+            for month in months:
+                create_partition(cursor, table, month, parent=new)
+
+        # Identity columns are not allowed on partitioned tables before PostgreSQL 17: use a sequence
+        cursor.execute(f'CREATE SEQUENCE {ITEM_TABLE}_id_seq_partitioned')
+        cursor.execute(
+            f'ALTER TABLE {ITEM_TABLE}_partitioned '
+            f"ALTER COLUMN id SET DEFAULT nextval('{ITEM_TABLE}_id_seq_partitioned')"
+        )
+
+        cursor.execute(f'INSERT INTO {ORDER_TABLE}_partitioned SELECT * FROM {ORDER_TABLE}')
+        cursor.execute(f'INSERT INTO {ITEM_TABLE}_partitioned SELECT * FROM {ITEM_TABLE}')
+        cursor.execute(f'DROP TABLE {ITEM_TABLE}')
+        cursor.execute(f'DROP TABLE {ORDER_TABLE}')
+
+        for table in PARTITION_KEYS:
+            cursor.execute(f'ALTER TABLE {table}_partitioned RENAME TO {table}')
+            cursor.execute(f'ALTER TABLE {table} RENAME CONSTRAINT {table}_partitioned_pkey TO {table}_pkey')
+            for definition in indexes[table]:
+                cursor.execute(definition)
+        cursor.execute(f'ALTER SEQUENCE {ITEM_TABLE}_id_seq_partitioned RENAME TO {ITEM_TABLE}_id_seq')
+        cursor.execute(f'ALTER SEQUENCE {ITEM_TABLE}_id_seq OWNED BY {ITEM_TABLE}.id')
+        cursor.execute(
+            f"SELECT setval('{ITEM_TABLE}_id_seq', COALESCE((SELECT max(id) FROM {ITEM_TABLE}), 0) + 1, false)"
+        )
+
+        for table, constraints in fks.items():
+            for name, definition in constraints:
+                cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+        cursor.execute(
+            f'ALTER TABLE {ITEM_TABLE} ADD CONSTRAINT {ITEM_TABLE}_order_fk '
+            f'FOREIGN KEY (order_id, order_created_at) REFERENCES {ORDER_TABLE} (id, created_at) '
+            'DEFERRABLE INITIALLY DEFERRED'
+        )
+    return months
+
+
+def write_jsonl(cursor, table, path):
+    """Stream every row of table into a gzip JSONL file, atomically"""
+    tmp = f'{path}.tmp'
+    encoder = DjangoJSONEncoder()
+    with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+        cursor.execute(f'SELECT * FROM {table}')
+        while True:
+            rows = cursor.fetchmany(2000)
+            if not rows:
+                break
+            # Server-side cursors only describe their columns after the first fetch
+            columns = [column[0] for column in cursor.description]
+            f.writelines(encoder.encode(dict(zip(columns, row))) + '\n' for row in rows)
+    os.replace(tmp, path)
+
+
+def archive_before(month, directory, drop=True):
+    """
+    Detach every monthly partition older than month, lines before orders,
+    then write each one to <directory>/<partition>.jsonl.gz and drop it.
+    With drop=False the detached tables are kept and nothing is written.
+    Returns the partition names handled.
+    """
+    cutoff = month_start(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITION_KEYS:
+            if not is_partitioned(cursor, table):
+                raise PartitionError(f'{table} is not partitioned; run order_partitions --convert first')
+        old = [
+            name
+            for table in PARTITION_KEYS
+            for partition_month, name in sorted(list_partitions(cursor, table).items())
+            if partition_month < cutoff
+        ]
+        for name in old:
+            table = PARTITION_NAME.match(name)['table']
+            cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+            if table == ITEM_TABLE:
+                # The detached lines keep a copy of the order foreign key, which would block detaching their orders
+                for constraint, definition in foreign_keys(cursor, name):
+                    if f'REFERENCES {ORDER_TABLE}(' in definition:
+                        cursor.execute(f'ALTER TABLE {name} DROP CONSTRAINT {constraint}')
+
+    if not drop:
+        return old
+
+    os.makedirs(directory, exist_ok=True)
+    for name in old:
+        # Detached tables take no new writes, so the file is complete
+        with transaction.atomic(), connection.chunked_cursor() as cursor:
+            write_jsonl(cursor, name, os.path.join(directory, f'{name}.jsonl.gz'))
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {name}')
+    return old
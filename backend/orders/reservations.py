@@ -0,0 +1,249 @@
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+from django.utils import timezone
+from .models import StockReservation
+from shop.models import Product
+
+
+class ReservationError(Exception):
+    """Raised when there is not enough unreserved stock for a hold"""
+
+
+def adjust_reserved(deltas):
+    """
+    Apply {product_id: delta} to Product.reserved_quantity with one UPDATE.
+    Callers are expected to hold the product row locks already, or to only
+    touch a single product.
+    """
+    deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    Product.objects.filter(id__in=deltas).update(
+        reserved_quantity=F('reserved_quantity') + Case(
+            *[When(id=product_id, then=delta) for product_id, delta in deltas.items()]
+        )
+    )
+
+
+def held_by_others(cart, product_ids):
+    """
+    {product_id: units held by other carts' unexpired reservations}, summed
+    with one query. Holds on striped products are only kept as
+    StockReservation rows, never added to the hot product row, so this is
+    how they are counted; expired ones are simply ignored.
+    """
+    if not product_ids:
+        return {}
+    return dict(
+        StockReservation.objects.filter(product_id__in=product_ids, expires_at__gt=timezone.now())
+        .exclude(cart=cart)
+        .values_list('product_id')
+        .annotate(total=Sum('quantity'))
+        .order_by()
+    )
+
+
+def release_expired_holds(cart, product_ids):
+    """
+    Release other carts' expired holds on plain products before a request
+    for them is rejected, so stock held by abandoned carts is not lost
+    until release_expired next runs. Holds locked by another transaction
+    (a checkout) are skipped rather than waited for. Must run inside a
+    transaction. Returns {product_id: units released}.
+    """
+    if not product_ids:
+        return {}
+    expired = list(
+        StockReservation.objects.select_for_update(skip_locked=True)
+        .filter(product_id__in=product_ids, expires_at__lte=timezone.now())
+        .exclude(cart=cart)
+        .values_list('id', 'product_id', 'quantity')
+    )
+    released = defaultdict(int)
+    for _, product_id, quantity in expired:
+        released[product_id] += quantity
+    adjust_reserved({product_id: -quantity for product_id, quantity in released.items()})
+    StockReservation.objects.filter(id__in=[row[0] for row in expired]).delete()
+    return released
+
+
+def add_reserved(product_id, delta):
+    """Raise a plain product's reserved_quantity by delta if its stock allows; returns whether it did"""
+    return Product.objects.filter(
+        id=product_id,
+        stock_quantity__gte=F('reserved_quantity') + delta
+    ).update(reserved_quantity=F('reserved_quantity') + delta) > 0
+
+
+@transaction.atomic
+def reserve_stock(cart, product, quantity):
+    """
+    Hold `quantity` units of a product for a cart line and (re)start its TTL.
+    Over-subscription is rejected here with a single conditional UPDATE
+    instead of being discovered under a lock at checkout.
+    Striped products are held in the StockReservation row alone, checked
+    against their stripes minus the other carts' holds, so that adding them
+    to a cart does not update the hot product row.
+    """
+    hold = StockReservation.objects.select_for_update().filter(cart=cart, product=product).first()
+    held = hold.quantity if hold else 0
+    delta = quantity - held
+
+    if product.is_striped:
+        available = product.total_stock - held_by_others(cart, [product.id]).get(product.id, 0)
+        if quantity > available:
+            raise ReservationError(
+                f'Insufficient stock for {product.name}. '
+                f'Available: {max(available, 0)}, Requested: {quantity}'
+            )
+    elif delta > 0:
+        updated = add_reserved(product.id, delta) or (
+            release_expired_holds(cart, [product.id]) and add_reserved(product.id, delta)
+        )
+        if not updated:
+            product.refresh_from_db(fields=['stock_quantity', 'reserved_quantity'])
+            raise ReservationError(
+                f'Insufficient stock for {product.name}. '
+                f'Available: {max(product.available_quantity + held, 0)}, Requested: {quantity}'
+            )
+    elif delta < 0:
+        adjust_reserved({product.id: delta})
+
+    expires_at = timezone.now() + settings.STOCK_RESERVATION_TTL
+    if hold:
+        hold.quantity = quantity
+        hold.expires_at = expires_at
+        hold.save(update_fields=['quantity', 'expires_at'])
+    else:
+        hold = StockReservation.objects.create(
+            cart=cart,
+            product=product,
+            quantity=quantity,
+            expires_at=expires_at
+        )
+    return hold
+
+
+@transaction.atomic
+def reserve_many(cart, products, quantities):
+    """
+    Set the holds of many cart lines at once: quantities is
+    {product_id: new line quantity}, 0 dropping the hold, and products maps
+    those ids to Product instances (with stripes prefetched).
+    Plain products are locked in id order and checked together, with other
+    carts' expired holds on them released when they come up short, then
+    reserved_quantity is adjusted with one UPDATE. Striped products are
+    checked against the other carts' holds and never locked or updated.
+    Holds are upserted with one INSERT ... ON CONFLICT. Raises
+    ReservationError listing every line that cannot be held; nothing is
+    changed in that case.
+    """
+    held = dict(
+        StockReservation.objects.select_for_update()
+        .filter(cart=cart, product_id__in=quantities)
+        .values_list('product_id', 'quantity')
+    )
+    plain_ids = sorted(pid for pid in quantities if not products[pid].is_striped)
+    stock = {
+        pid: (stock_quantity, reserved_quantity)
+        for pid, stock_quantity, reserved_quantity in Product.objects.select_for_update()
+        .filter(id__in=plain_ids).order_by('id').values_list('id', 'stock_quantity', 'reserved_quantity')
+    }
+    others = held_by_others(cart, [pid for pid in quantities if products[pid].is_striped])
+
+    short = [
+        pid for pid in plain_ids
+        if quantities[pid] > stock[pid][0] - stock[pid][1] + held.get(pid, 0)
+    ]
+    for pid, released in release_expired_holds(cart, short).items():
+        stock_quantity, reserved_quantity = stock[pid]
+        stock[pid] = (stock_quantity, reserved_quantity - released)
+
+    errors = []
+    deltas = {}
+    for pid, quantity in quantities.items():
+        product = products[pid]
+        if product.is_striped:
+            available = product.total_stock - others.get(pid, 0)
+        else:
+            stock_quantity, reserved_quantity = stock[pid]
+            available = stock_quantity - reserved_quantity + held.get(pid, 0)
+            deltas[pid] = quantity - held.get(pid, 0)
+        if quantity > available:
+            errors.append(f'Insufficient stock for {product.name}. Available: {max(available, 0)}, Requested: {quantity}')
+    if errors:
+        raise ReservationError(' '.join(errors))
+
+    adjust_reserved(deltas)
+
+    expires_at = timezone.now() + settings.STOCK_RESERVATION_TTL
+    StockReservation.objects.bulk_create(
+        [
+            StockReservation(cart=cart, product_id=pid, quantity=quantity, expires_at=expires_at)
+            for pid, quantity in quantities.items() if quantity > 0
+        ],
+        update_conflicts=True,
+        unique_fields=['cart', 'product'],
+        update_fields=['quantity', 'expires_at'],
+    )
+    StockReservation.objects.filter(
+        cart=cart, product_id__in=[pid for pid in held if quantities[pid] == 0]
+    ).delete()
+
+
+@transaction.atomic
+def release_stock(cart, product):
+    """Drop the hold for a cart line, returning its units to the pool"""
+    hold = StockReservation.objects.select_for_update().filter(cart=cart, product=product).first()
+    if hold:
+        if not product.is_striped:
+            adjust_reserved({product.id: -hold.quantity})
+        hold.delete()
+
+
+def lock_cart_holds(cart):
+    """
+    Lock every hold of a cart and return {product_id: quantity} for the
+    holds counted in Product.reserved_quantity, i.e. on plain products.
+    Must be called inside a transaction, before any product row is locked,
+    so checkout and the sweeper always take locks in the same order.
+    """
+    holds = (
+        StockReservation.objects.select_for_update(of=('self',))
+        .filter(cart=cart)
+        .values_list('product_id', 'quantity', 'product__stock_stripes')
+    )
+    return {product_id: quantity for product_id, quantity, stripes in holds if not stripes}
+
+
+def release_expired(batch_size=500, now=None):
+    """
+    Release one batch of expired holds.
+    Rows locked by an in-flight checkout are skipped; that checkout will
+    confirm or drop them itself. Returns the number of holds released.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(
+            StockReservation.objects.select_for_update(skip_locked=True, of=('self',))
+            .filter(expires_at__lte=now)
+            .order_by('expires_at')
+            .values_list('id', 'product_id', 'quantity', 'product__stock_stripes')[:batch_size]
+        )
+        if not expired:
+            return 0
+
+        # Holds on striped products are only the rows themselves
+        deltas = defaultdict(int)
+        for _, product_id, quantity, stripes in expired:
+            if not stripes:
+                deltas[product_id] -= quantity
+
+        # Lock products in id order, like checkout does, before touching them
+        list(Product.objects.select_for_update().filter(id__in=deltas).order_by('id').values_list('id', flat=True))
+        adjust_reserved(deltas)
+        StockReservation.objects.filter(id__in=[row[0] for row in expired]).delete()
+
+    return len(expired)
@@ -0,0 +1,136 @@
+"""
+Daily and per-product sales rollups.
+
+Rollups are recomputed a whole day at a time, which makes every run
+idempotent: an incremental run finds the days touched by orders created
+or changed (Order.updated_at) since the watermark and rebuilds just those
+days. Windows may overlap freely, so the watermark is moved back by
+SALES_ROLLUP_LAG to pick up transactions that committed late.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import DailySales, Order, OrderItem, ProductDailySales, RollupWatermark
+
+WATERMARK = 'sales'
+CANCELLED = Q(status='CANCELLED')
+
+
+def average(revenue, order_count):
+    """Average order value, rounded to cents"""
+    return (revenue / order_count).quantize(Decimal('0.01')) if order_count else Decimal('0.00')
+
+
+def day_bounds(days):
+    """
+    OR of [midnight, midnight) ranges covering sorted days, consecutive days
+    merged, so the (created_at, id) index can be used
+    """
+    ranges = []
+    for day in days:
+        if ranges and ranges[-1][1] == day:
+            ranges[-1][1] = day + timedelta(days=1)
+        else:
+            ranges.append([day, day + timedelta(days=1)])
+
+    condition = Q()
+    for start, end in ranges:
+        condition |= Q(
+            created_at__gte=timezone.make_aware(datetime.combine(start, time.min)),
+            created_at__lt=timezone.make_aware(datetime.combine(end, time.min)),
+        )
+    return condition
+
+
+@transaction.atomic
+def rebuild_days(days):
+    """Replace the rollup rows of the given days with fresh aggregates"""
+    days = sorted(set(days))
+    if not days:
+        return
+    orders = Order.objects.filter(day_bounds(days))
+
+    product_rows = (
+        OrderItem.objects.filter(order__in=orders.exclude(CANCELLED).values('id'))
+        .values('product_id', day=TruncDate('order__created_at'))
+        .annotate(
+            order_count=Count('order_id', distinct=True),
+            units=Sum('quantity'),
+            revenue=Sum(ExpressionWrapper(
+                F('quantity') * F('price_at_purchase'),
+                output_field=DecimalField(max_digits=14, decimal_places=2)
+            )),
+        )
+        .order_by()
+    )
+    product_sales = [ProductDailySales(**row) for row in product_rows]
+
+    units = {}
+    for row in product_sales:
+        units[row.day] = units.get(row.day, 0) + row.units
+
+    day_rows = (
+        orders.values(day=TruncDate('created_at'))
+        .annotate(
+            order_count=Count('id', filter=~CANCELLED),
+            cancelled_count=Count('id', filter=CANCELLED),
+            revenue=Sum('total_amount', filter=~CANCELLED, default=0),
+        )
+        .order_by()
+    )
+    daily_sales = [DailySales(units=units.get(row['day'], 0), **row) for row in day_rows]
+
+    DailySales.objects.filter(day__in=days).delete()
+    ProductDailySales.objects.filter(day__in=days).delete()
+    DailySales.objects.bulk_create(daily_sales)
+    ProductDailySales.objects.bulk_create(product_sales, batch_size=1000)
+
+
+def changed_days(since):
+    """Days (by created_at) of orders created or changed after since"""
+    orders = Order.objects.all() if since is None else Order.objects.filter(updated_at__gt=since)
+    return set(
+        orders.annotate(day=TruncDate('created_at'))
+        .order_by().values_list('day', flat=True).distinct()
+    )
+
+
+def update_rollups():
+    """Rebuild the days touched since the last run. Returns the number of days rebuilt."""
+    started = timezone.now()
+    watermark = RollupWatermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first()
+    since = watermark - timedelta(seconds=settings.SALES_ROLLUP_LAG) if watermark else None
+
+    days = changed_days(since)
+    rebuild_days(days)
+    RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'value': started})
+    return len(days)
+
+
+def full_rebuild(chunk_days=31):
+    """
+    Recompute every rollup from the orders table, a chunk of days per
+    transaction, for backfills and after deletes (which the watermark cannot
+    see). Days before the oldest order are kept: their orders may have been
+    archived by order_partitions. Returns the number of days rebuilt.
+    """
+    started = timezone.now()
+    bounds = Order.objects.aggregate(first=Min('created_at'), last=Max('created_at'))
+    count = 0
+    if bounds['first'] is not None:
+        first = timezone.localdate(bounds['first'])
+        last = timezone.localdate(bounds['last'])
+        DailySales.objects.filter(day__gt=last).delete()
+        ProductDailySales.objects.filter(day__gt=last).delete()
+
+        # Every day in range is rebuilt, so rows of days whose orders are gone are dropped too
+        count = (last - first).days + 1
+        for offset in range(0, count, chunk_days):
+            rebuild_days(first + timedelta(days=n) for n in range(offset, min(offset + chunk_days, count)))
+
+    RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'value': started})
+    return count
@@ -1,3 +1,4 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from shop.serializers import ProductSerializer
 from .models import Cart, CartItem, Order, OrderItem
@@ -7,10 +8,16 @@ class CartItemSerializer(serializers.ModelSerializer):
     """Serializer for CartItem with nested product details"""
     product = ProductSerializer(read_only=True)
     product_id = serializers.IntegerField(write_only=True)
+    subtotal = serializers.SerializerMethodField()
+
+    def get_subtotal(self, obj):
+        """Price times quantity, annotated in SQL by cart_for_response"""
+        subtotal = getattr(obj, 'subtotal', None)
+        return subtotal if subtotal is not None else obj.product.price * obj.quantity
 
     class Meta:
         model = CartItem
-        fields = ['id', 'product', 'product_id', 'quantity']
+        fields = ['id', 'product', 'product_id', 'quantity', 'subtotal']
         read_only_fields = ['id']
 
 
@@ -20,7 +27,10 @@ class CartSerializer(serializers.ModelSerializer):
     total = serializers.SerializerMethodField()
 
     def get_total(self, obj):
-        """Calculate total price of all items in cart"""
+        """Total price of the cart, summed in SQL by cart_for_response"""
+        total = getattr(obj, 'total', None)
+        if total is not None:
+            return total
         return sum(item.product.price * item.quantity for item in obj.items.all())
 
     class Meta:
@@ -30,8 +40,16 @@ class CartSerializer(serializers.ModelSerializer):
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
-    """Serializer for OrderItem with product details"""
-    product = ProductSerializer(read_only=True)
+    """Serializer for OrderItem; product details come from the checkout snapshot, not the Product row"""
+    product = serializers.SerializerMethodField()
+
+    def get_product(self, obj):
+        return {
+            'id': obj.product_id,
+            'name': obj.product_name,
+            'image_url': default_storage.url(obj.product_image) if obj.product_image else None,
+            'thumbnail_url': default_storage.url(obj.product_thumbnail) if obj.product_thumbnail else None,
+        }
 
     class Meta:
         model = OrderItem
@@ -49,6 +67,16 @@ class OrderSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'total_amount', 'created_at']
 
 
+class OrderSummarySerializer(serializers.ModelSerializer):
+    """Lightweight order row; item_count is annotated in SQL by the view"""
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'status', 'total_amount', 'item_count', 'created_at']
+        read_only_fields = fields
+
+
 class AdminOrderSerializer(serializers.ModelSerializer):
     """Admin serializer for Order with user details"""
     items = OrderItemSerializer(many=True, read_only=True)
@@ -1,3 +1,310 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.models import User
+from shop.inventory import stripe_stock
+from shop.models import Product
+from . import cart_store
+from .reservations import ReservationError, release_expired, reserve_many, reserve_stock
+from .models import Cart, CartItem, Order, OrderItem, StockReservation
+from .checkout import CheckoutError, checkout_cart
+from .export import export_orders
+from .partitions import ITEM_TABLE, ORDER_TABLE, archive_before, convert, foreign_keys
 
-# Create your tests here.
+
+@override_settings(CART_STORE='database')
+class CartQueryCountTests(TestCase):
+    """GET /api/cart/ and POST /api/cart/batch/ cost the same number of queries whatever the cart size"""
+
+    CART_QUERIES = 3  # cart with its SQL total, lines with products and subtotals, stripes
+    BATCH_QUERIES = 18
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        cls.cart = Cart.objects.create(user=cls.user)
+        cls.products = Product.objects.bulk_create([
+            Product(name=f'Product {i}', description='', price=Decimal('2.50') + i, stock_quantity=100)
+            for i in range(30)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def fill_cart(self, lines):
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=product, quantity=i + 1)
+            for i, product in enumerate(self.products[:lines])
+        ])
+
+    def assert_priced(self, data, lines):
+        prices = {product.id: product.price for product in self.products}
+        self.assertEqual(len(data['items']), lines)
+        for item in data['items']:
+            self.assertEqual(Decimal(item['subtotal']), prices[item['product']['id']] * item['quantity'])
+        self.assertEqual(
+            Decimal(data['total']),
+            sum((prices[item['product']['id']] * item['quantity'] for item in data['items']), Decimal('0'))
+        )
+
+    def test_cart_queries_do_not_grow_with_lines(self):
+        for lines in (1, 30):
+            with self.subTest(lines=lines):
+                CartItem.objects.filter(cart=self.cart).delete()
+                self.fill_cart(lines)
+                with self.assertNumQueries(self.CART_QUERIES):
+                    response = self.client.get('/api/cart/')
+                self.assertEqual(response.status_code, 200)
+                self.assert_priced(response.data, lines)
+
+    def test_batch_queries_do_not_grow_with_lines(self):
+        for lines in (1, 30):
+            with self.subTest(lines=lines):
+                operations = [
+                    {'op': 'set', 'product_id': product.id, 'quantity': 2} for product in self.products[:lines]
+                ]
+                with self.assertNumQueries(self.BATCH_QUERIES):
+                    response = self.client.post('/api/cart/batch/', {'operations': operations}, format='json')
+                self.assertEqual(response.status_code, 200)
+                self.assert_priced(response.data, lines)
+
+
+class StaleCartTests(TestCase):
+    """Adding to a cart that cleanup_carts deleted meanwhile re-creates it instead of failing on its foreign key"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        cls.product = Product.objects.create(name='Product', description='', price=5, stock_quantity=10)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.addCleanup(cache.delete, cart_store.cart_key(self.user.pk))
+
+    def add(self):
+        return self.client.post('/api/cart/items/', {'product_id': self.product.id, 'quantity': 2}, format='json')
+
+    def assert_in_new_cart(self, old_id):
+        cart = Cart.objects.get(user=self.user)
+        self.assertNotEqual(cart.pk, old_id)
+        self.assertEqual(list(cart.items.values_list('product_id', 'quantity')), [(self.product.id, 2)])
+        self.assertEqual(list(cart.reservations.values_list('product_id', 'quantity')), [(self.product.id, 2)])
+
+    @override_settings(CART_STORE='database')
+    def test_database_cart(self):
+        old_id = Cart.objects.create(user=self.user).pk
+        Cart.objects.filter(pk=old_id).delete()
+        self.assertEqual(self.add().status_code, 201)
+        self.assert_in_new_cart(old_id)
+
+    @override_settings(CART_STORE='cache')
+    def test_cached_cart(self):
+        self.assertEqual(self.client.get('/api/cart/').status_code, 200)
+        old_id = Cart.objects.get(user=self.user).pk
+        # Deleted before cleanup_carts drops the cached copy
+        Cart.objects.filter(pk=old_id).delete()
+        self.assertEqual(self.add().status_code, 201)
+        self.assertTrue(cart_store.flush_cart(self.user.pk))
+        self.assert_in_new_cart(old_id)
+
+
+class StripedReservationTests(TestCase):
+    """Holds on striped products live only in StockReservation, never in the product row"""
+
+    def setUp(self):
+        product = Product.objects.create(name='Bestseller', description='', price=5, stock_quantity=10)
+        self.product = stripe_stock(product, 4)
+        self.carts = [
+            Cart.objects.create(user=User.objects.create_user(f'shopper{i}', f'shopper{i}@example.com', 'unused'))
+            for i in range(2)
+        ]
+
+    def product_updates(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith(f'UPDATE "{Product._meta.db_table}"')]
+
+    def test_holds_do_not_update_the_product_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            reserve_stock(self.carts[0], self.product, 6)
+            reserve_many(self.carts[1], {self.product.id: self.product}, {self.product.id: 4})
+        self.assertEqual(self.product_updates(queries), [])
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_quantity, 0)
+        self.assertEqual(self.product.available_quantity, 0)
+
+    def test_other_carts_holds_are_counted(self):
+        reserve_stock(self.carts[0], self.product, 8)
+        with self.assertRaises(ReservationError):
+            reserve_stock(self.carts[1], self.product, 3)
+        with self.assertRaises(ReservationError):
+            reserve_many(self.carts[1], {self.product.id: self.product}, {self.product.id: 3})
+
+        # A cart may resize its own hold up to everything not held by others
+        reserve_stock(self.carts[0], self.product, 10)
+        CartItem.objects.create(cart=self.carts[1], product=self.product, quantity=1)
+        with self.assertRaises(CheckoutError):
+            checkout_cart(self.carts[1], self.carts[1].user)
+
+    def test_expiry_and_checkout(self):
+        reserve_stock(self.carts[0], self.product, 8)
+        StockReservation.objects.update(expires_at=datetime(2020, 1, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(release_expired(), 1)
+
+        reserve_stock(self.carts[1], self.product, 3)
+        CartItem.objects.create(cart=self.carts[1], product=self.product, quantity=3)
+        checkout_cart(self.carts[1], self.carts[1].user)
+        self.assertFalse(StockReservation.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.total_stock, self.product.reserved_quantity), (7, 0))
+
+    def test_unstriping_counts_the_holds(self):
+        reserve_stock(self.carts[0], self.product, 6)
+        product = stripe_stock(self.product, 0)
+        self.assertEqual((product.stock_quantity, product.reserved_quantity), (10, 6))
+        self.assertEqual(stripe_stock(product, 2).reserved_quantity, 0)
+
+
+class BulkStatusTests(TestCase):
+    """POST /api/admin/orders/bulk-status/ only changes the orders its ids or filter select"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'unused')
+        cls.shopper = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        cls.other = User.objects.create_user('other', 'other@example.com', 'unused')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.orders = [
+            Order.objects.create(user=user, status='PAID', total_amount=Decimal('5.00'))
+            for user in (self.shopper, self.shopper, self.other)
+        ]
+
+    def post(self, **data):
+        return self.client.post('/api/admin/orders/bulk-status/', {'status': 'SHIPPED', **data}, format='json')
+
+    def statuses(self):
+        return [Order.objects.get(pk=order.pk).status for order in self.orders]
+
+    def test_filter(self):
+        response = self.post(filter={'status': 'PAID', 'user': self.shopper.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], 2)
+        self.assertEqual(self.statuses(), ['SHIPPED', 'SHIPPED', 'PAID'])
+
+    def test_ids(self):
+        response = self.post(ids=[str(self.orders[2].pk)])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.statuses(), ['PAID', 'PAID', 'SHIPPED'])
+
+    def test_empty_filters_are_rejected(self):
+        for filters in ({}, {'status': ''}, {'user': None}, {'status': ' ', 'user': self.shopper.pk},
+                        {'created_before': []}, {'user': 0}, {'stauts': 'PAID'}):
+            with self.subTest(filters=filters):
+                self.assertEqual(self.post(filter=filters).status_code, 400)
+        self.assertEqual(self.statuses(), ['PAID', 'PAID', 'PAID'])
+
+
+class ExpiredHoldTests(TestCase):
+    """Other carts' expired holds do not stop a request, even before the sweeper has run"""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Product', description='', price=5, stock_quantity=10)
+        self.carts = [
+            Cart.objects.create(user=User.objects.create_user(f'shopper{i}', f'shopper{i}@example.com', 'unused'))
+            for i in range(2)
+        ]
+        reserve_stock(self.carts[0], self.product, 8)
+        StockReservation.objects.update(expires_at=datetime(2020, 1, 1, tzinfo=dt_timezone.utc))
+
+    def assert_released(self, reserved):
+        self.assertFalse(StockReservation.objects.filter(cart=self.carts[0]).exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.reserved_quantity, reserved)
+
+    def test_reserve_stock(self):
+        reserve_stock(self.carts[1], self.product, 5)
+        self.assert_released(5)
+
+    def test_reserve_many(self):
+        reserve_many(self.carts[1], {self.product.id: self.product}, {self.product.id: 5})
+        self.assert_released(5)
+
+    def test_checkout(self):
+        CartItem.objects.create(cart=self.carts[1], product=self.product, quantity=5)
+        checkout_cart(self.carts[1], self.carts[1].user)
+        self.assert_released(0)
+        self.assertEqual(self.product.stock_quantity, 5)
+
+    def test_unexpired_holds_still_count(self):
+        StockReservation.objects.update(expires_at=datetime(2100, 1, 1, tzinfo=dt_timezone.utc))
+        with self.assertRaises(ReservationError):
+            reserve_stock(self.carts[1], self.product, 5)
+
+
+class OrderExportTests(TestCase):
+    def test_formats_agree(self):
+        user = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        product = Product.objects.create(name='Product', description='', price=5, stock_quantity=10)
+        order = Order.objects.create(user=user, total_amount=Decimal('5.00'))
+        OrderItem.objects.create(order=order, product=product, quantity=1, price_at_purchase=5)
+        orders = Order.objects.all()
+
+        csv_rows = list(csv.DictReader(io.StringIO(''.join(export_orders(orders, 'csv')))))
+        jsonl_rows = [json.loads(line) for line in ''.join(export_orders(orders, 'jsonl')).splitlines()]
+        self.assertEqual(csv_rows[0]['created_at'], order.created_at.isoformat())
+        self.assertEqual(jsonl_rows[0]['created_at'], order.created_at.isoformat())
+        self.assertEqual(csv_rows[0]['order_id'], jsonl_rows[0]['order_id'])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Order partitioning requires PostgreSQL')
+class OrderPartitionTests(TestCase):
+    """Converts the order tables inside the test transaction, which rolls the DDL back afterwards"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('shopper', 'shopper@example.com', 'unused')
+        self.product = Product.objects.create(name='Product', description='', price=5, stock_quantity=10)
+        self.old_order = self.create_order()
+        Order.objects.filter(pk=self.old_order.pk).update(created_at=datetime(2020, 1, 15, tzinfo=dt_timezone.utc))
+        self.old_order.refresh_from_db()
+        OrderItem.objects.create(order=self.old_order, product=self.product, quantity=1, price_at_purchase=5)
+
+    def create_order(self):
+        return Order.objects.create(user=self.user, total_amount=Decimal('5.00'))
+
+    def references(self, table):
+        with connection.cursor() as cursor:
+            return sorted(definition.split(' REFERENCES ')[1].split('(')[0] for _, definition in foreign_keys(cursor, table))
+
+    def test_convert_keeps_foreign_keys_and_data(self):
+        order_refs, item_refs = self.references(ORDER_TABLE), self.references(ITEM_TABLE)
+        convert(months_ahead=1)
+
+        self.assertEqual(self.references(ORDER_TABLE), order_refs)
+        # Partition clones of the line -> order key reference each order partition as well
+        self.assertTrue(set(item_refs) <= set(self.references(ITEM_TABLE)))
+
+        order = self.create_order()
+        OrderItem.objects.create(order=order, product=self.product, quantity=2, price_at_purchase=5)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(OrderItem.objects.filter(order=order).count(), 1)
+
+    def test_archive_before_drops_old_months(self):
+        convert(months_ahead=1)
+        with tempfile.TemporaryDirectory() as directory:
+            handled = archive_before(datetime(2020, 2, 1), directory)
+            self.assertEqual(sorted(handled), sorted([f'{ITEM_TABLE}_p2020_01', f'{ORDER_TABLE}_p2020_01']))
+            self.assertEqual(sorted(os.listdir(directory)), [f'{name}.jsonl.gz' for name in sorted(handled)])
+        self.assertFalse(Order.objects.filter(pk=self.old_order.pk).exists())
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Now
+from .handlers import ORDER_STATUS_CHANGED
+from .models import Order
+from core.outbox import publish_many
+
+
+class TransitionError(Exception):
+    """Raised when a bulk transition request cannot be applied at all"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+def allowed_sources(target):
+    """Statuses that may move to target"""
+    return [source for source, targets in Order.ALLOWED_TRANSITIONS.items() if target in targets]
+
+
+@transaction.atomic
+def bulk_transition(orders, target, ids=None):
+    """
+    Move every order in the queryset to the target status with one UPDATE.
+
+    Matching rows are locked in id order first, so the statuses checked
+    here are the ones the UPDATE changes. Returns one outcome per order:
+    'updated', 'unchanged' (already in target), 'invalid' (transition not
+    allowed) or, for requested ids that matched nothing, 'not_found'.
+    """
+    if target not in Order.ALLOWED_TRANSITIONS:
+        raise TransitionError(f'Invalid status: {target}')
+
+    limit = settings.ORDER_BULK_STATUS_LIMIT
+    current = list(
+        orders.select_for_update().order_by('id').values_list('id', 'status')[:limit + 1]
+    )
+    if len(current) > limit:
+        raise TransitionError(f'More than {limit} orders match, narrow the selection')
+
+    sources = allowed_sources(target)
+    movable = [pk for pk, status in current if status in sources]
+    if movable:
+        Order.objects.filter(id__in=movable).update(status=target, updated_at=Now())
+        publish_many(ORDER_STATUS_CHANGED, [
+            {'order_id': str(pk), 'from': status, 'to': target} for pk, status in current if status in sources
+        ])
+
+    results = []
+    for pk, status in current:
+        if status in sources:
+            results.append({'id': pk, 'outcome': 'updated', 'status': target})
+        elif status == target:
+            results.append({'id': pk, 'outcome': 'unchanged', 'status': status})
+        else:
+            results.append({'id': pk, 'outcome': 'invalid', 'status': status,
+                            'error': f'Cannot move a {status} order to {target}'})
+
+    found = {pk for pk, _ in current}
+    results.extend({'id': pk, 'outcome': 'not_found'} for pk in ids or () if pk not in found)
+    return results
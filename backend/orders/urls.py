@@ -1,14 +1,22 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CartViewSet, CheckoutAPIView, OrderListAPIView, AdminOrderListAPIView
+from .views import (
+    CartViewSet, CheckoutAPIView, OrderListAPIView,
+    AdminOrderListAPIView, AdminOrderExportAPIView, AdminOrderBulkStatusAPIView,
+    AdminAnalyticsAPIView
+)
 
 router = DefaultRouter()
 router.register(r'cart/items', CartViewSet, basename='cart-items')
 
 urlpatterns = [
     path('cart/', CartViewSet.as_view({'get': 'cart'}), name='cart-detail'),
+    path('cart/batch/', CartViewSet.as_view({'post': 'batch'}), name='cart-batch'),
     path('orders/', OrderListAPIView.as_view(), name='order-list'),
     path('orders/checkout/', CheckoutAPIView.as_view(), name='checkout'),
     path('admin/orders/', AdminOrderListAPIView.as_view(), name='admin-order-list'),
+    path('admin/orders/export/', AdminOrderExportAPIView.as_view(), name='admin-order-export'),
+    path('admin/orders/bulk-status/', AdminOrderBulkStatusAPIView.as_view(), name='admin-order-bulk-status'),
     path('admin/orders/<uuid:pk>/', AdminOrderListAPIView.as_view(), name='admin-order-update'),
+    path('admin/analytics/', AdminAnalyticsAPIView.as_view(), name='admin-analytics'),
 ] + router.urls
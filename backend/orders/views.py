@@ -1,11 +1,32 @@
+import uuid
+from datetime import timedelta
+from decimal import Decimal
 from django.db import transaction
-from rest_framework import viewsets, status
+from django.db.models import Count, F, Max, Sum, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import generics, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
-from .models import Cart, CartItem, Order, OrderItem
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer, AdminOrderSerializer
+from .models import Cart, CartItem, DailySales, Order, ProductDailySales, RollupWatermark
+from .serializers import (
+    CartSerializer, CartItemSerializer, OrderSerializer, OrderSummarySerializer, AdminOrderSerializer
+)
+from .pagination import OrderCursorPagination
+from . import cart_store
+from .cart import CartError, apply_cart_operations, cart_for_response, lock_cart, locks_cart, touch_cart
+from .checkout import CheckoutError, checkout_cart
+from .export import EXPORT_FORMATS, export_orders
+from .filters import filter_orders
+from .rollups import WATERMARK as SALES_WATERMARK, average
+from .transitions import TransitionError, bulk_transition
+from .reservations import ReservationError, reserve_stock, release_stock
+from core.conditional import ConditionalGetMixin
+from core.idempotency import idempotent
 from shop.models import Product
 
 
@@ -27,13 +48,43 @@ class CartViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='', url_name='cart-summary')
     def cart(self, request):
         """Get user's cart with all items - accessed via GET /api/cart/"""
-        cart = self.get_cart()
-        serializer = CartSerializer(cart)
+        if cart_store.uses_cart_cache():
+            try:
+                return Response(cart_store.get_cart_data(request.user))
+            except CartError as e:
+                return Response({'error': e.message}, status=e.status_code)
+        serializer = CartSerializer(cart_for_response(request.user))
+        return Response(serializer.data)
+
+    def batch(self, request):
+        """
+        Apply several cart changes at once - POST /api/cart/batch/
+        {"operations": [{"op": "add", "product_id": 1, "quantity": 2},
+                        {"op": "set", "product_id": 2, "quantity": 5},
+                        {"op": "remove", "product_id": 3}]}
+        Returns the updated cart.
+        """
+        operations = request.data.get('operations')
+        try:
+            if cart_store.uses_cart_cache():
+                return Response(cart_store.apply_operations(request.user, operations))
+            apply_cart_operations(request.user, operations)
+        except CartError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        except ReservationError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        serializer = CartSerializer(cart_for_response(request.user))
         return Response(serializer.data)
 
     def create(self, request):
         """Add item to cart"""
-        cart = self.get_cart()
+        if cart_store.uses_cart_cache():
+            return self.create_cached(request)
+
         product_id = request.data.get('product_id')
         quantity = int(request.data.get('quantity', 1))
 
@@ -46,6 +97,21 @@ class CartViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+        with transaction.atomic():
+            return self.add_line(lock_cart(request.user.pk), product, quantity)
+
+    def add_line(self, cart, product, quantity):
+        """Add `quantity` of a product to the locked cart"""
+        # Hold stock for the new line quantity before touching the cart
+        existing = CartItem.objects.filter(cart=cart, product=product).values_list('quantity', flat=True).first() or 0
+        try:
+            reserve_stock(cart, product, existing + quantity)
+        except ReservationError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # Check if item already exists in cart
         cart_item, created = CartItem.objects.get_or_create(
             cart=cart,
@@ -57,10 +123,28 @@ class CartViewSet(viewsets.ModelViewSet):
             # Update quantity if item already exists
             cart_item.quantity += quantity
             cart_item.save()
+        touch_cart(cart.pk)
 
         serializer = self.get_serializer(cart_item)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def create_cached(self, request):
+        """Add item to the cached cart, returning the line like create does"""
+        operation = {'op': 'add', 'product_id': request.data.get('product_id'), 'quantity': request.data.get('quantity', 1)}
+        try:
+            cart = cart_store.apply_operations(request.user, [operation])
+        except CartError as e:
+            return Response({'error': e.message}, status=e.status_code)
+        except ReservationError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        line = next(line for line in cart['items'] if line['product']['id'] == int(operation['product_id']))
+        return Response(line, status=status.HTTP_201_CREATED)
+
+    @cart_store.flushes_cart
+    @locks_cart
     def update(self, request, pk=None, partial=False):
         """Update cart item quantity"""
         try:
@@ -73,8 +157,17 @@ class CartViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+            try:
+                reserve_stock(cart_item.cart, cart_item.product, quantity)
+            except ReservationError as e:
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
             cart_item.quantity = quantity
             cart_item.save()
+            touch_cart(cart_item.cart_id)
 
             serializer = self.get_serializer(cart_item)
             return Response(serializer.data)
@@ -84,11 +177,15 @@ class CartViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @cart_store.flushes_cart
+    @locks_cart
     def destroy(self, request, pk=None):
         """Remove item from cart"""
         try:
             cart_item = self.get_object()
+            release_stock(cart_item.cart, cart_item.product)
             cart_item.delete()
+            touch_cart(cart_item.cart_id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except CartItem.DoesNotExist:
             return Response(
@@ -98,10 +195,14 @@ class CartViewSet(viewsets.ModelViewSet):
 
 
 class CheckoutAPIView(APIView):
-    """Checkout view - Convert cart to order with atomic transaction"""
+    """
+    Checkout view - Convert cart to order with atomic transaction.
+    Send an Idempotency-Key header to make retries return the first result.
+    """
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    @idempotent('checkout')
+    @cart_store.flushes_cart
     def post(self, request):
         """Process checkout: validate stock, create order, deduct stock, clear cart"""
         try:
@@ -112,100 +213,215 @@ class CheckoutAPIView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        cart_items = cart.items.all()
+        try:
+            order = checkout_cart(cart, request.user)
+        except CheckoutError as e:
+            return Response({'error': e.message}, status=e.status_code)
 
-        if not cart_items.exists():
-            return Response(
-                {'error': 'Cart is empty'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        prefetch_related_objects([order], 'items')
+        serializer = OrderSerializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        # Validate stock availability for all items
-        for item in cart_items:
-            if item.product.stock_quantity < item.quantity:
-                return Response(
-                    {'error': f'Insufficient stock for {item.product.name}. Available: {item.product.stock_quantity}, Requested: {item.quantity}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
 
-        # Calculate total amount
-        total = sum(item.product.price * item.quantity for item in cart_items)
+class OrderListAPIView(ConditionalGetMixin, generics.ListAPIView):
+    """
+    List orders for the authenticated user, newest first, cursor paginated.
+    GET /api/orders/                 full orders with items
+    GET /api/orders/?view=summary    id, status, total and item count only
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = OrderCursorPagination
 
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            status='PENDING',
-            total_amount=total
-        )
+    def is_summary(self):
+        return self.request.query_params.get('view') == 'summary'
 
-        # Create order items and deduct stock
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                product=item.product,
-                price_at_purchase=item.product.price,  # CRITICAL: Save price snapshot
-                quantity=item.quantity
-            )
+    def get_serializer_class(self):
+        return OrderSummarySerializer if self.is_summary() else OrderSerializer
 
-            # Deduct stock
-            item.product.stock_quantity -= item.quantity
-            item.product.save()
+    def get_queryset(self):
+        """Get user's orders with everything the serializer needs in a fixed number of queries"""
+        orders = Order.objects.filter(user=self.request.user)
+        if self.is_summary():
+            return orders.annotate(item_count=Coalesce(Sum('items__quantity'), 0))
+        return orders.prefetch_related('items')
+
+    def get_validators(self, request, *args, **kwargs):
+        # updated_at moves on status changes, the count on new orders
+        orders = Order.objects.filter(user=request.user).aggregate(
+            last_modified=Max('updated_at'),
+            count=Count('id')
+        )
+        return (request.user.pk, orders['last_modified'], orders['count']), orders['last_modified']
 
-        # Clear cart
-        cart_items.delete()
 
-        serializer = OrderSerializer(order)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+class AdminOrderListAPIView(generics.ListAPIView):
+    """
+    Admin: List orders from all customers, newest first, cursor paginated.
+    GET /api/admin/orders/?status=PAID,SHIPPED&created_after=2026-01-01&created_before=2026-02-01&user=42
+    """
+    serializer_class = AdminOrderSerializer
+    permission_classes = [IsAdminUser]
+    pagination_class = OrderCursorPagination
 
+    def get_queryset(self):
+        return Order.objects.select_related('user').prefetch_related('items')
 
-class OrderListAPIView(APIView):
-    """List all orders for the authenticated user"""
-    permission_classes = [IsAuthenticated]
+    def filter_queryset(self, queryset):
+        """Apply ?status=, ?created_after=, ?created_before= and ?user= filters"""
+        return filter_orders(queryset, self.request.query_params)
 
-    def get(self, request):
-        """Get user's orders"""
-        orders = Order.objects.filter(user=request.user).order_by('-created_at')
-        serializer = OrderSerializer(orders, many=True)
+    def patch(self, request, pk=None):
+        """Update order status (admin only), following the same transition rules as bulk-status"""
+        try:
+            result, = bulk_transition(Order.objects.filter(pk=pk), request.data.get('status'), ids=[pk])
+        except TransitionError:
+            return Response(
+                {'error': 'Invalid status'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if result['outcome'] == 'not_found':
+            return Response(
+                {'error': 'Order not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if result['outcome'] == 'invalid':
+            return Response(
+                {'error': result['error']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        order = Order.objects.select_related('user').prefetch_related('items').get(pk=pk)
+        serializer = AdminOrderSerializer(order)
         return Response(serializer.data)
 
 
-class AdminOrderListAPIView(APIView):
-    """Admin: List all orders from all customers"""
-    permission_classes = [IsAuthenticated]
+class AdminOrderExportAPIView(APIView):
+    """
+    Admin: Stream every matching order line as CSV or JSONL.
+    GET /api/admin/orders/export/?type=jsonl&status=PAID&created_after=2026-01-01
+    Accepts the same filters as the order list.
+    """
+    permission_classes = [IsAdminUser]
 
     def get(self, request):
-        """Get all orders (admin only)"""
-        if not request.user.is_staff:
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in EXPORT_FORMATS:
             return Response(
-                {'error': 'Admin access required'},
-                status=status.HTTP_403_FORBIDDEN
+                {'error': f'Unsupported export type, expected one of: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        orders = Order.objects.all().select_related('user').order_by('-created_at')
-        serializer = AdminOrderSerializer(orders, many=True)
-        return Response(serializer.data)
 
-    def patch(self, request, pk=None):
-        """Update order status (admin only)"""
-        if not request.user.is_staff:
+        orders = filter_orders(Order.objects.all(), request.query_params)
+        response = StreamingHttpResponse(export_orders(orders, fmt), content_type=EXPORT_FORMATS[fmt])
+        filename = f'orders-{timezone.now():%Y%m%d-%H%M%S}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class AdminOrderBulkStatusAPIView(APIView):
+    """
+    Admin: Move many orders to a new status in one request.
+    POST /api/admin/orders/bulk-status/
+        {"status": "SHIPPED", "ids": ["<uuid>", ...]}
+        {"status": "SHIPPED", "filter": {"status": "PAID", "created_before": "2026-01-02"}}
+    The filter takes the same keys as the order list. Responds with an outcome per order.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        target = request.data.get('status')
+        ids = request.data.get('ids')
+        filters = request.data.get('filter')
+
+        if (ids is None) == (filters is None):
+            return Response(
+                {'error': 'Provide either ids or filter'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if ids is not None:
+            try:
+                ids = list(dict.fromkeys(uuid.UUID(str(pk)) for pk in ids))
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'ids must be a list of order ids'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            orders = Order.objects.filter(id__in=ids)
+        elif isinstance(filters, dict) and filters:
+            orders = filter_orders(Order.objects.all(), filters, strict=True)
+        else:
             return Response(
-                {'error': 'Admin access required'},
-                status=status.HTTP_403_FORBIDDEN
+                {'error': 'filter must be a non-empty object'},
+                status=status.HTTP_400_BAD_REQUEST
             )
+
+        try:
+            results = bulk_transition(orders, target, ids=ids)
+        except TransitionError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'status': target,
+            'updated': sum(result['outcome'] == 'updated' for result in results),
+            'results': results,
+        })
+
+
+class AdminAnalyticsAPIView(APIView):
+    """
+    Admin: Sales figures read from the rollup tables only.
+    GET /api/admin/analytics/?start=2026-01-01&end=2026-01-31&top=10
+    Defaults to the last 30 days. Run update_sales_rollups to refresh.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
         try:
-            order = Order.objects.get(pk=pk)
-        except Order.DoesNotExist:
+            end = parse_date(params['end']) if params.get('end') else timezone.localdate()
+            start = parse_date(params['start']) if params.get('start') else end and end - timedelta(days=29)
+        except ValueError:
+            start = end = None
+        top = params.get('top', '10')
+        if start is None or end is None or start > end:
             return Response(
-                {'error': 'Order not found'},
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'start and end must be ISO dates with start <= end'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        new_status = request.data.get('status')
-        if new_status and new_status in dict(Order.STATUS_CHOICES):
-            order.status = new_status
-            order.save()
-            serializer = AdminOrderSerializer(order)
-            return Response(serializer.data)
-        return Response(
-            {'error': 'Invalid status'},
-            status=status.HTTP_400_BAD_REQUEST
+        if not top.isdigit() or not 0 < int(top) <= 100:
+            return Response(
+                {'error': 'top must be between 1 and 100'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        daily = list(DailySales.objects.filter(day__range=(start, end)).values(
+            'day', 'order_count', 'cancelled_count', 'units', 'revenue'
+        ))
+        for row in daily:
+            row['average_order_value'] = average(row['revenue'], row['order_count'])
+
+        totals = {
+            'order_count': sum(row['order_count'] for row in daily),
+            'cancelled_count': sum(row['cancelled_count'] for row in daily),
+            'units': sum(row['units'] for row in daily),
+            'revenue': sum((row['revenue'] for row in daily), Decimal('0')),
+        }
+        totals['average_order_value'] = average(totals['revenue'], totals['order_count'])
+
+        top_products = list(
+            ProductDailySales.objects.filter(day__range=(start, end))
+            .values('product_id', name=F('product__name'))
+            .annotate(units=Sum('units'), revenue=Sum('revenue'))
+            .order_by('-revenue', 'product_id')[:int(top)]
         )
+
+        watermark = RollupWatermark.objects.filter(name=SALES_WATERMARK).values_list('value', flat=True).first()
+        return Response({
+            'start': start,
+            'end': end,
+            'updated_through': watermark,
+            'totals': totals,
+            'daily': daily,
+            'top_products': top_products,
+        })
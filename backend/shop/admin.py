@@ -1,12 +1,53 @@
+from django import forms
 from django.contrib import admin
-from .models import Product
+from .inventory import set_stock
+from .models import Product, StockStripe
+
+
+class StockStripeInline(admin.TabularInline):
+    """Inline admin for striped stock counters"""
+    model = StockStripe
+    extra = 0
+    readonly_fields = ['stripe', 'quantity']
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+class ProductAdminForm(forms.ModelForm):
+    """Shows a striped product's stock as the sum of its stripes"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and self.instance.is_striped and 'stock_quantity' in self.fields:
+            self.initial['stock_quantity'] = self.instance.total_stock
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     """Admin interface for Product model"""
-    list_display = ['name', 'price', 'stock_quantity', 'is_active', 'created_at']
+    form = ProductAdminForm
+    inlines = [StockStripeInline]
+    list_display = ['name', 'price', 'stock_quantity', 'reserved_quantity', 'stock_stripes', 'is_active', 'created_at']
     list_filter = ['is_active', 'created_at']
+    readonly_fields = ['stock_stripes']
     search_fields = ['name', 'description']
     list_editable = ['is_active', 'stock_quantity']
     ordering = ['-created_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('stripes')
+
+    def get_changelist_form(self, request, **kwargs):
+        return super().get_changelist_form(request, form=ProductAdminForm, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        """Striped products spread an edited stock level over their stripes, like the API does"""
+        if not obj.is_striped:
+            return super().save_model(request, obj, form, change)
+        stock = obj.stock_quantity
+        obj.stock_quantity = 0  # Stock on hand lives in the stripes
+        super().save_model(request, obj, form, change)
+        if 'stock_quantity' in form.changed_data:
+            set_stock(obj, stock)
@@ -0,0 +1,79 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def get_catalog_version():
+    """
+    Current catalog version. It starts from the clock rather than 1 so that
+    a version key lost to eviction can never resurrect old entries.
+    """
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """Invalidate every cached catalog response at once"""
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def get_or_build(key, build):
+    """
+    Return the cached bytes for `key` in the current catalog version,
+    calling build() on a miss. Only one caller rebuilds a missing entry;
+    the others wait for it instead of all hitting the database at once.
+    """
+    full_key = f'catalog:{get_catalog_version()}:{key}'
+    content = cache.get(full_key)
+    if content is not None:
+        return content
+
+    lock_key = f'{full_key}:lock'
+    lock_timeout = settings.CATALOG_CACHE_LOCK_TIMEOUT
+    if cache.add(lock_key, 1, timeout=lock_timeout):
+        try:
+            content = build()
+            cache.set(full_key, content, timeout=settings.CATALOG_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return content
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        content = cache.get(full_key)
+        if content is not None:
+            return content
+
+    # The rebuilding request died or is very slow, do it ourselves
+    return build()
+
+
+class CatalogCacheMixin:
+    """
+    Serve GET responses of public catalog views from the cache as
+    pre-rendered JSON bytes, keyed by the full request URL.
+    Other formats (e.g. the browsable API) bypass the cache.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return super().get(request, *args, **kwargs)
+
+        def build():
+            response = super(CatalogCacheMixin, self).get(request, *args, **kwargs)
+            return JSONRenderer().render(response.data)
+
+        key = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        return HttpResponse(get_or_build(key, build), content_type='application/json')
@@ -0,0 +1,35 @@
+"""
+Storefront categories. Products have no category column, so a category
+is the set of products whose name or description mentions one of its
+keywords (precise, non-overlapping phrases).
+"""
+from django.db.models import Q
+
+CATEGORY_KEYWORDS = {
+    'mobile-accessories': [
+        'phone case', 'phone charger', 'phone stand', 'phone holder', 'screen protector', 'power bank',
+        'phone cable', 'phone mount', 'phone grip', 'mobile charger', 'mobile case', 'tablet stand', 'tablet',
+        'ipad', 'wireless charging', 'charging pad',
+    ],
+    'laptop-accessories': [
+        'laptop stand', 'laptop bag', 'laptop sleeve', 'laptop cooling', 'usb hub', 'usb-c hub',
+        'docking station', 'laptop charger', 'monitor stand', 'desk organizer', 'keyboard', 'webcam',
+        'mouse pad', 'gaming mouse', 'cable management', 'gaming chair', 'ergonomic chair', 'desk lamp',
+        'external ssd', 'ssd', 'external drive', 'multiport',
+    ],
+    'audio-devices': ['headphone', 'earphone', 'speaker', 'earbuds', 'headset', 'soundbar', 'airpods', 'audio'],
+    'smart-wearables': [
+        'smartwatch', 'smart watch', 'fitness band', 'fitness tracker', 'smart band', 'apple watch', 'galaxy watch',
+    ],
+}
+
+
+def filter_category(queryset, category):
+    """Products of a category; unknown categories leave the queryset unfiltered"""
+    keywords = CATEGORY_KEYWORDS.get(category)
+    if not keywords:
+        return queryset
+    condition = Q()
+    for keyword in keywords:
+        condition |= Q(name__icontains=keyword) | Q(description__icontains=keyword)
+    return queryset.filter(condition)
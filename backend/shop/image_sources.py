@@ -0,0 +1,89 @@
+"""
+Image sources used to seed product photos (see add_category_products).
+A source turns a seed entry into image bytes; sources are called from
+worker threads, so they must not share mutable state.
+"""
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+POLLINATIONS_URL = 'https://image.pollinations.ai/prompt/{prompt}?width=800&height=800&nologo=true'
+
+
+def image_filename(name):
+    """File name for a product photo, shared with assign_local_images"""
+    return f"{name.lower().replace(' ', '_')}.jpg"
+
+
+class HTTPImageSource:
+    """Fetch a generated image for the entry's image_prompt over HTTP"""
+
+    def __init__(self, url_template=POLLINATIONS_URL, timeout=30):
+        self.url_template = url_template
+        self.timeout = timeout
+
+    def url(self, item):
+        return self.url_template.format(prompt=urllib.parse.quote(item['image_prompt']))
+
+    def key(self, item):
+        """Rate limiting bucket"""
+        return urllib.parse.urlparse(self.url(item)).netloc
+
+    def fetch(self, item):
+        req = urllib.request.Request(self.url(item), headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return response.read()
+
+
+class DirectoryImageSource:
+    """Read <product_name>.jpg from a local directory instead of the network"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, item):
+        return 'directory'
+
+    def fetch(self, item):
+        with open(os.path.join(self.path, image_filename(item['name'])), 'rb') as f:
+            return f.read()
+
+
+class RateLimiter:
+    """Spaces out requests to the same host by at least 1/rate seconds"""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_allowed = {}
+        self.lock = threading.Lock()
+
+    def wait(self, key):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed.get(key, now))
+            self.next_allowed[key] = slot + self.interval
+        time.sleep(slot - now)
+
+
+def is_retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code == 429 or error.code >= 500
+    return isinstance(error, (urllib.error.URLError, TimeoutError, ConnectionError))
+
+
+def fetch_with_retry(source, item, limiter, retries=3, backoff=1.0):
+    """Fetch through the rate limiter, retrying transient errors with exponential backoff"""
+    for attempt in range(retries + 1):
+        limiter.wait(source.key(item))
+        try:
+            return source.fetch(item)
+        except Exception as e:
+            if attempt == retries or not is_retryable(e):
+                raise
+            time.sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
@@ -0,0 +1,110 @@
+"""
+Responsive image derivatives for product photos.
+
+Rendering is CPU bound, so each (width, format) variant is produced in a
+process pool. This module must not import models: pool workers may be
+started with spawn/forkserver and only need the Pillow code below.
+"""
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+_pool = None
+
+
+def get_pool():
+    """Lazily started, per-process pool; None when rendering inline"""
+    global _pool
+    if _pool is None and settings.PRODUCT_IMAGE_WORKERS > 0:
+        _pool = ProcessPoolExecutor(max_workers=settings.PRODUCT_IMAGE_WORKERS)
+    return _pool
+
+
+def variant_widths(source_width):
+    """Configured widths that do not upscale; always at least the smallest one"""
+    widths = sorted(settings.PRODUCT_IMAGE_WIDTHS)
+    fitting = [w for w in widths if w <= source_width]
+    return fitting or widths[:1]
+
+
+def variant_name(digest, width, fmt):
+    return f'products/variants/{digest}-{width}w.{fmt}'
+
+
+def render_variant(source, width, fmt):
+    """Resize image bytes to `width` pixels wide and encode them as `fmt`"""
+    with Image.open(io.BytesIO(source)) as image:
+        image = ImageOps.exif_transpose(image)
+        if fmt == 'jpeg' or image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGB')
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, **FORMATS[fmt])
+        return output.getvalue()
+
+
+def plan_variants(source):
+    """Return (digest, [(width, fmt, storage name)]) for an original image"""
+    digest = hashlib.sha256(source).hexdigest()[:16]
+    with Image.open(io.BytesIO(source)) as image:
+        source_width = image.width
+    return digest, [
+        (width, fmt, variant_name(digest, width, fmt))
+        for width in variant_widths(source_width)
+        for fmt in FORMATS
+    ]
+
+
+def render_all(jobs, pool=None):
+    """
+    Render [(source, width, fmt, name)] jobs, in the pool when there is one.
+    Yields (name, bytes). Names are content hashed, so existing files are skipped.
+    """
+    pending = [job for job in jobs if not default_storage.exists(job[3])]
+    pool = pool or get_pool()
+    if pool is None:
+        for source, width, fmt, name in pending:
+            yield name, render_variant(source, width, fmt)
+        return
+
+    futures = [(name, pool.submit(render_variant, source, width, fmt)) for source, width, fmt, name in pending]
+    for name, future in futures:
+        yield name, future.result()
+
+
+def read_original(product):
+    with product.image.open('rb') as f:
+        return f.read()
+
+
+def variants_for(plan):
+    """Build the Product.image_variants mapping: {fmt: {width: storage name}}"""
+    variants = {}
+    for width, fmt, name in plan:
+        variants.setdefault(fmt, {})[str(width)] = name
+    return variants
+
+
+def generate_variants(product):
+    """Render and store every derivative of a product's image, then record them"""
+    if not product.image:
+        product.image_variants = {}
+    else:
+        source = read_original(product)
+        _, plan = plan_variants(source)
+        for name, content in render_all([(source, width, fmt, name) for width, fmt, name in plan]):
+            default_storage.save(name, ContentFile(content))
+        product.image_variants = variants_for(plan)
+    product.save(update_fields=['image_variants', 'updated_at'])
+    return product.image_variants
@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models import Case, F, Sum, When
+from .cache import bump_catalog_version
+from .models import Product, StockStripe
+
+
+def split_evenly(total, parts):
+    """Split `total` into `parts` integers that differ by at most one"""
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+@transaction.atomic
+def set_stock(product, total):
+    """Set a product's stock on hand, spreading it over its stripes if striped"""
+    product = Product.objects.select_for_update().get(pk=product.pk)
+    if not product.is_striped:
+        product.stock_quantity = total
+        product.save(update_fields=['stock_quantity', 'updated_at'])
+        return product
+
+    stripes = list(StockStripe.objects.select_for_update().filter(product=product).order_by('stripe'))
+    for stripe, quantity in zip(stripes, split_evenly(total, len(stripes))):
+        stripe.quantity = quantity
+    StockStripe.objects.bulk_update(stripes, ['quantity'])
+    transaction.on_commit(bump_catalog_version)
+    return product
+
+
+@transaction.atomic
+def stripe_stock(product, stripes):
+    """
+    Switch a product to `stripes` sub-counters, or back to the single
+    stock_quantity column when stripes is 0. Stock on hand is preserved,
+    and so are cart holds: striped products keep them only as reservation
+    rows, plain ones also count them in reserved_quantity.
+    """
+    product = Product.objects.select_for_update().get(pk=product.pk)
+    total = product.total_stock
+    held = product.reservations.aggregate(total=Sum('quantity'))['total'] or 0
+
+    StockStripe.objects.filter(product=product).delete()
+    if stripes:
+        StockStripe.objects.bulk_create([
+            StockStripe(product=product, stripe=i, quantity=quantity)
+            for i, quantity in enumerate(split_evenly(total, stripes))
+        ])
+
+    product.stock_stripes = stripes
+    product.stock_quantity = 0 if stripes else total
+    product.reserved_quantity = 0 if stripes else held
+    product.save(update_fields=['stock_stripes', 'stock_quantity', 'reserved_quantity', 'updated_at'])
+    return product
+
+
+def take_from_stripes(product_id, quantity):
+    """
+    Decrement a striped product's stock by `quantity`. Must run inside a
+    transaction. Picks a random stripe with enough spare stock that no other
+    transaction has locked; only when none qualifies does it wait for every
+    stripe and drain them in order. Returns False if stock is insufficient.
+    """
+    stripe = (
+        StockStripe.objects.select_for_update(skip_locked=True)
+        .filter(product_id=product_id, quantity__gte=quantity)
+        .order_by('?')
+        .first()
+    )
+    if stripe:
+        StockStripe.objects.filter(id=stripe.id).update(quantity=F('quantity') - quantity)
+        return True
+
+    stripes = list(StockStripe.objects.select_for_update().filter(product_id=product_id).order_by('stripe'))
+    if sum(s.quantity for s in stripes) < quantity:
+        return False
+
+    taken = {}
+    remaining = quantity
+    for s in stripes:
+        if not remaining:
+            break
+        take = min(s.quantity, remaining)
+        if take:
+            taken[s.id] = take
+            remaining -= take
+
+    StockStripe.objects.filter(id__in=taken).update(
+        quantity=F('quantity') - Case(*[When(id=stripe_id, then=take) for stripe_id, take in taken.items()])
+    )
+    return True
@@ -1,15 +1,38 @@
-import urllib.parse
-import urllib.request
-import time
-from django.core.management.base import BaseCommand
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from shop.cache import bump_catalog_version
+from shop.image_sources import (
+    POLLINATIONS_URL, DirectoryImageSource, HTTPImageSource, RateLimiter, fetch_with_retry, image_filename
+)
+from shop.inventory import set_stock
 from shop.models import Product
+from shop.search import update_search_vector
 
 
 class Command(BaseCommand):
     help = 'Add 40 products across 4 categories with AI-generated images'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent image downloads')
+        parser.add_argument('--rate', type=float, default=2.0, help='Max requests per second per host (0 = unlimited)')
+        parser.add_argument('--retries', type=int, default=3, help='Retries for transient download errors')
+        parser.add_argument('--backoff', type=float, default=1.0, help='Base delay in seconds between retries')
+        parser.add_argument('--timeout', type=int, default=30, help='HTTP timeout in seconds')
+        parser.add_argument('--source', choices=['http', 'directory'], default='http', help='Where images come from')
+        parser.add_argument('--url-template', default=POLLINATIONS_URL,
+                            help='HTTP source URL with a {prompt} placeholder, e.g. a local stand-in server')
+        parser.add_argument('--source-dir', help='Directory of <product_name>.jpg files for --source directory')
+        parser.add_argument('--manifest', default=None,
+                            help='Resume manifest (default: MEDIA_ROOT/products/.seed_manifest.json)')
+
+    def handle(self, *args, **options):
         products = [
             # ===== MOBILE ACCESSORIES (10 products) =====
             {
@@ -301,48 +324,17 @@ class Command(BaseCommand):
             },
         ]
 
-        created_count = 0
-        updated_count = 0
-
-        for product_data in products:
-            product, created = Product.objects.update_or_create(
-                name=product_data['name'],
-                defaults={
-                    'description': product_data['description'],
-                    'price': product_data['price'],
-                    'stock_quantity': product_data['stock_quantity'],
-                    'is_active': True
-                }
-            )
-
-            # Download and save image
-            if 'image_prompt' in product_data and (not product.image or created):
-                try:
-                    self.stdout.write(f"Generating image for {product.name}...")
-                    
-                    # Construct Pollinations.ai URL with prompts
-                    prompt = urllib.parse.quote(product_data['image_prompt'])
-                    # w=800 h=800 for square clear images, nologo=true (implied)
-                    image_url = f"https://image.pollinations.ai/prompt/{prompt}?width=800&height=800&nologo=true"
-                    
-                    req = urllib.request.Request(
-                        image_url,
-                        headers={'User-Agent': 'Mozilla/5.0'}
-                    )
-                    
-                    with urllib.request.urlopen(req, timeout=30) as response:
-                        image_content = ContentFile(response.read())
-                        filename = f"{product.name.lower().replace(' ', '_')}.jpg"
-                        product.image.save(filename, image_content, save=True)
-                        time.sleep(1) # Be nice to the API
-                        
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Failed to save image for {product.name}: {str(e)}"))
+        created_names, updated_count, products_by_name = self.upsert_products(products)
+        created_count = len(created_names)
 
-            if created:
-                created_count += 1
-            else:
-                updated_count += 1
+        # Products that need an image: new ones, or existing ones without one
+        wanted = [
+            item for item in products
+            if 'image_prompt' in item
+            and (not products_by_name[item['name']].image or item['name'] in created_names)
+        ]
+        if wanted:
+            self.fetch_images(wanted, products_by_name, options)
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -350,3 +342,124 @@ class Command(BaseCommand):
                 f'{created_count} created, {updated_count} updated'
             )
         )
+
+    @transaction.atomic
+    def upsert_products(self, products):
+        """
+        Create or update all products with one SELECT, one bulk INSERT and
+        bulk UPDATEs. Striped products keep stock_quantity at 0 and get
+        their stock spread over their stripes by set_stock instead.
+        """
+        existing = {product.name: product for product in Product.objects.filter(name__in=[p['name'] for p in products])}
+
+        to_create = []
+        to_update = []
+        striped = []
+        now = timezone.now()
+        for product_data in products:
+            product = existing.get(product_data['name']) or Product(name=product_data['name'])
+            product.description = product_data['description']
+            product.price = product_data['price']
+            product.is_active = True
+            product.updated_at = now  # bulk_update skips auto_now
+            if product.pk and product.is_striped:
+                striped.append((product, product_data['stock_quantity']))
+            else:
+                product.stock_quantity = product_data['stock_quantity']
+                (to_update if product.pk else to_create).append(product)
+
+        Product.objects.bulk_create(to_create)
+        Product.objects.bulk_update(to_update, ['description', 'price', 'stock_quantity', 'is_active', 'updated_at'])
+        Product.objects.bulk_update([product for product, _ in striped], ['description', 'price', 'is_active', 'updated_at'])
+        for product, stock in striped:
+            set_stock(product, stock)
+        # bulk_create leaves pk unset on some backends, so read the new rows back
+        created = Product.objects.filter(name__in=[p.name for p in to_create])
+        existing.update({product.name: product for product in created})
+
+        # Bulk writes send no signals
+        update_search_vector(Product.objects.filter(name__in=existing))
+        transaction.on_commit(bump_catalog_version)
+        return {product.name for product in to_create}, len(to_update) + len(striped), existing
+
+    def get_source(self, options):
+        if options['source'] == 'directory':
+            if not options['source_dir']:
+                raise CommandError('--source directory requires --source-dir')
+            return DirectoryImageSource(options['source_dir'])
+        return HTTPImageSource(options['url_template'], timeout=options['timeout'])
+
+    def fetch_images(self, wanted, products_by_name, options):
+        """
+        Download images on a bounded thread pool and attach them to products.
+        Every stored file is recorded in a manifest, so a rerun after a crash
+        or on a fresh database reuses files instead of downloading them again.
+        """
+        manifest_path = options['manifest'] or os.path.join(settings.MEDIA_ROOT, 'products', '.seed_manifest.json')
+        manifest = self.load_manifest(manifest_path)
+        source = self.get_source(options)
+        limiter = RateLimiter(options['rate'])
+
+        attached = []
+        to_fetch = []
+        for item in wanted:
+            stored = manifest.get(item['name'])
+            if stored and default_storage.exists(stored):
+                products_by_name[item['name']].image = stored
+                attached.append(products_by_name[item['name']])
+            else:
+                to_fetch.append(item)
+
+        if attached:
+            self.stdout.write(f'Reusing {len(attached)} images from {manifest_path}')
+
+        try:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                futures = {
+                    pool.submit(fetch_with_retry, source, item, limiter, options['retries'], options['backoff']): item
+                    for item in to_fetch
+                }
+                for future in as_completed(futures):
+                    item = futures[future]
+                    product = products_by_name[item['name']]
+                    try:
+                        content = future.result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"Failed to save image for {product.name}: {str(e)}"))
+                        continue
+
+                    # Files and the manifest are written from this thread only
+                    stored = default_storage.save(f'products/{image_filename(product.name)}', ContentFile(content))
+                    manifest[product.name] = stored
+                    product.image = stored
+                    attached.append(product)
+                    self.stdout.write(f"Saved image for {product.name}")
+                    if len(manifest) % 10 == 0:
+                        self.save_manifest(manifest_path, manifest)
+        finally:
+            self.save_manifest(manifest_path, manifest)
+            now = timezone.now()
+            for product in attached:
+                product.image_variants = {}
+                product.updated_at = now
+            Product.objects.bulk_update(attached, ['image', 'image_variants', 'updated_at'])
+            if attached:
+                bump_catalog_version()
+
+    def load_manifest(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            self.stdout.write(self.style.WARNING(f'Ignoring unreadable manifest {path}'))
+            return {}
+
+    def save_manifest(self, path, manifest):
+        """Write through a temporary file so a crash never leaves a truncated manifest"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
@@ -1,95 +1,101 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from shop.cache import bump_catalog_version
 from shop.models import Product
+import json
 import os
+import re
 from django.conf import settings
+from django.utils import timezone
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif')
+DEFAULT_MAPPING = os.path.join(os.path.dirname(__file__), 'product_image_map.json')
+
+# Suffix Django's storage appends when a file name is already taken, e.g. "earbuds_Ab3dE9x.png"
+STORAGE_SUFFIX = re.compile(r'_[A-Za-z0-9]{7}$')
+
+
+def stem(filename):
+    return filename.rsplit('.', 1)[0]
+
+
+def build_file_index(image_files):
+    """
+    Map file names, stems and suffix-free stems to the actual file, once.
+    Lookups are then O(1) instead of scanning every file for every product.
+    The first file seen wins, like the old first-match scan.
+    """
+    index = {}
+    for filename in image_files:
+        base = stem(filename)
+        for key in (filename, base, STORAGE_SUFFIX.sub('', base)):
+            index.setdefault(key, filename)
+    return index
 
 
 class Command(BaseCommand):
     help = 'Assign existing local product images to products based on name matching'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--mapping', default=DEFAULT_MAPPING,
+                            help='JSON file mapping product names to image file names')
+        parser.add_argument('--dry-run', action='store_true', help='Report matches without saving')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk UPDATE')
+
+    def handle(self, *args, **options):
         media_products_path = os.path.join(settings.MEDIA_ROOT, 'products')
-        
+
         # Get all image files in the products directory
         if not os.path.exists(media_products_path):
             self.stdout.write(self.style.ERROR(f'Media products directory not found: {media_products_path}'))
             return
-        
-        image_files = [f for f in os.listdir(media_products_path) 
-                      if f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp', '.avif'))]
-        
+
+        try:
+            with open(options['mapping']) as f:
+                product_image_map = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read mapping file {options["mapping"]}: {e}')
+
+        with os.scandir(media_products_path) as entries:
+            image_files = [entry.name for entry in entries
+                           if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS)]
+
         self.stdout.write(f'Found {len(image_files)} images in media/products/')
-        
-        # Manual mapping of product names to image files
-        product_image_map = {
-            'MagSafe Phone Case': 'magsafe_phone_case.jpg',
-            'Tempered Glass Screen Protector': 'tempered_glass_screen_protector.jpg',
-            'Fast Charging USB-C Cable': 'fast_charging_usb-c_cable.jpg',
-            '20000mAh Power Bank': '20000mah_power_bank.jpg',
-            'Adjustable Phone Stand': 'adjustable_phone_stand.jpg',
-            'Wireless Charging Pad': 'wireless_charging_pad.png',
-            'PopSocket Grip & Stand': 'popsocket_grip__stand.jpg',
-            'Car Phone Mount': 'car_phone_mount.jpg',
-            'USB-C to Lightning Cable': 'usb-c_to_lightning_cable.jpg',
-            'Phone Camera Lens Kit': 'phone_camera_lens_kit.jpg',
-            
-            'Aluminum Laptop Stand': 'aluminum_laptop_stand.jpg',
-            'Mechanical RGB Keyboard': 'keyboard.png',
-            'Wireless Gaming Mouse': 'wireless_gaming_mouse.jpg',
-            '11-in-1 USB-C Hub': '11-in-1_usb-c_hub.jpg',
-            'Laptop Sleeve 15.6 inch': 'laptop_sleeve_15.6_inch.jpg',
-            'Laptop Cooling Pad': 'laptop_cooling_pad.jpg',
-            '1080p HD Webcam': '1080p_hd_webcam.jpg',
-            'Portable External SSD 1TB': 'external_ssd.png',
-            'Cable Management Kit': 'cable_kit.png',
-            'Monitor Stand Riser': 'monitor_stand_riser.jpg',
-            
-            'Wireless Earbuds Pro': 'earbuds.png',
-            'Over-Ear Headphones': 'headphones.png',
-            'Portable Bluetooth Speaker': 'portable_bluetooth_speaker.jpg',
-            'USB Condenser Microphone': 'usb_condenser_microphone.jpg',
-            'Gaming Headset RGB': 'gaming_headset_rgb.jpg',
-            '3.5mm Audio Cable Gold-Plated': '3.5mm_audio_cable_gold-plated.jpg',
-            'Headphone Stand': 'headphone_stand.jpg',
-            'Soundbar for TV': 'soundbar_for_tv.jpg',
-            'Silicone Earphone Case': 'silicone_earphone_case.jpg',
-            'Audio Splitter 3.5mm': 'audio_splitter_3.5mm.jpg',
-            
-            'Smartwatch Series 7': 'smartwatch_series_7.jpg',
-            'Fitness Tracker Band': 'fitness_tracker_band.jpg',
-            'Premium Smart Band': 'premium_smart_band.jpg',
-            'VR Headset Gaming': 'vr_headset_gaming.jpg',
-            'Smart Glasses': 'smart_glasses.jpg',
-            'Action Camera Watch': 'action_camera_watch.jpg',
-            'Health Monitor Watch': 'health_monitor_watch.jpg',
-            'GPS Running Watch': 'gps_running_watch.jpg',
-            'Sleep Tracker Ring': 'sleep_tracker_ring.jpg',
-            'Kids Smartwatch': 'kids_smartwatch.jpg',
-        }
-        
-        updated_count = 0
+        file_index = build_file_index(image_files)
+
+        changed = []
+        matched_count = 0
         not_found_count = 0
-        
-        for product in Product.objects.all():
-            if product.name in product_image_map:
-                image_filename = product_image_map[product.name]
-                
-                # Check if the image file exists
-                if image_filename in image_files or any(img.startswith(image_filename.rsplit('.', 1)[0]) for img in image_files):
-                    # Find the actual file (might have different extension or suffix)
-                    actual_file = next((f for f in image_files if f.startswith(image_filename.rsplit('.', 1)[0])), image_filename)
-                    
-                    product.image = f'products/{actual_file}'
-                    product.save()
-                    updated_count += 1
-                    self.stdout.write(self.style.SUCCESS(f'✓ Updated {product.name} -> {actual_file}'))
-                else:
-                    not_found_count += 1
-                    self.stdout.write(self.style.WARNING(f'✗ Image not found for {product.name}: {image_filename}'))
+
+        for product in Product.objects.only('id', 'name', 'image').iterator(chunk_size=2000):
+            # Fall back to the file naming used by add_category_products
+            image_filename = product_image_map.get(product.name) or f"{product.name.lower().replace(' ', '_')}.jpg"
+            actual_file = file_index.get(image_filename) or file_index.get(stem(image_filename))
+
+            if actual_file:
+                matched_count += 1
+                image_path = f'products/{actual_file}'
+                if product.image.name != image_path:
+                    product.image = image_path
+                    product.image_variants = {}  # Thumbnails belong to the old image
+                    product.updated_at = timezone.now()  # bulk_update skips auto_now
+                    changed.append(product)
+                if options['verbosity'] > 1:
+                    self.stdout.write(self.style.SUCCESS(f'✓ {product.name} -> {actual_file}'))
             else:
                 not_found_count += 1
-                self.stdout.write(self.style.WARNING(f'✗ No mapping for product: {product.name}'))
-        
-        self.stdout.write(self.style.SUCCESS(f'\n✅ Updated {updated_count} products'))
+                if options['verbosity'] > 1:
+                    self.stdout.write(self.style.WARNING(f'✗ Image not found for {product.name}: {image_filename}'))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'\n[dry run] {matched_count} matched, {len(changed)} would be updated'))
+        else:
+            # One short transaction per chunk
+            batch_size = options['batch_size']
+            for start in range(0, len(changed), batch_size):
+                Product.objects.bulk_update(changed[start:start + batch_size], ['image', 'image_variants', 'updated_at'])
+            if changed:
+                bump_catalog_version()  # bulk_update sends no signals
+            self.stdout.write(self.style.SUCCESS(f'\n✅ {matched_count} matched, updated {len(changed)} products'))
+
         if not_found_count > 0:
             self.stdout.write(self.style.WARNING(f'⚠️  {not_found_count} products without images'))
@@ -0,0 +1,73 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from core.bench import rolled_back, time_calls
+from shop.cache import bump_catalog_version
+from shop.models import Product
+from shop.search import search_products, update_search_vector, uses_postgres_search
+
+
+class Command(BaseCommand):
+    help = 'Compare ranked full-text search with icontains scans over a synthetic catalog (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic products to insert')
+        parser.add_argument('--queries', type=int, default=50, help='Queries timed per strategy')
+        parser.add_argument('--page-size', type=int, default=24)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        vocabulary = [self.make_word(rng) for _ in range(20_000)]
+
+        with rolled_back():
+            self.populate(rng, vocabulary, options['rows'])
+            queries = [' '.join(rng.sample(vocabulary[:2000], rng.choice((1, 2)))) for _ in range(options['queries'])]
+            self.report('icontains', queries, lambda q: self.icontains_page(q, options['page_size']))
+            self.report('full-text', queries, lambda q: self.search_page(q, options['page_size']))
+
+    def make_word(self, rng):
+        return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+
+    def populate(self, rng, vocabulary, rows):
+        self.stdout.write(f'Inserting {rows} synthetic products...')
+        start = time.perf_counter()
+        batch = []
+        for i in range(rows):
+            batch.append(Product(
+                name=' '.join(rng.choices(vocabulary, k=3)),
+                description=' '.join(rng.choices(vocabulary, k=30)),
+                price=rng.randint(100, 50000) / 100,
+                stock_quantity=rng.randint(0, 500),
+            ))
+            if len(batch) == 10_000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        bump_catalog_version()  # bulk_create sends no signals
+
+        if uses_postgres_search():
+            update_search_vector(Product.objects.all())
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE shop_product')
+        self.stdout.write(f'Populated in {time.perf_counter() - start:.1f}s')
+
+    def icontains_page(self, query, page_size):
+        terms = query.split()
+        condition = Q()
+        for term in terms:
+            condition &= Q(name__icontains=term) | Q(description__icontains=term)
+        queryset = Product.objects.filter(condition, is_active=True)
+        return queryset.count(), list(queryset.order_by('-created_at')[:page_size])
+
+    def search_page(self, query, page_size):
+        results = search_products(Product.objects.filter(is_active=True), query)
+        count = results.count() if hasattr(results, 'count') and callable(results.count) else len(results)
+        return count, list(results[:page_size])
+
+    def report(self, label, queries, run):
+        # The warm-up call builds the in-memory index on SQLite
+        median, p95 = time_calls(run, queries)
+        self.stdout.write(f'{label:>10}: median {median:.1f} ms, p95 {p95:.1f} ms')
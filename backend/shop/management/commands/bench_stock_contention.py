@@ -0,0 +1,82 @@
+import threading
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from core.models import User
+from orders.checkout import checkout_cart
+from orders.models import Cart, CartItem
+from shop.inventory import stripe_stock
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent checkouts of a single SKU with and without striped stock (PostgreSQL only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16, help='Concurrent checkout workers')
+        parser.add_argument('--orders', type=int, default=100, help='Checkouts per worker')
+        parser.add_argument('--stripes', type=int, default=8, help='Stripes for the striped run')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('This benchmark needs PostgreSQL row locking; other backends serialize all writes.')
+
+        for stripes in (0, options['stripes']):
+            label = f'{stripes} stripes' if stripes else 'single counter'
+            elapsed, total, errors = self.run_once(stripes, options['threads'], options['orders'])
+            self.stdout.write(
+                f'{label:>16}: {total} checkouts in {elapsed:.2f}s = {total / elapsed:.0f}/s, {len(errors)} failed'
+            )
+            for error in errors[:5]:
+                self.stdout.write(self.style.WARNING(f'  checkout failed: {error}'))
+
+    def run_once(self, stripes, threads, orders):
+        """
+        Run `threads` workers that each check out one unit `orders` times.
+        Returns (elapsed seconds, successful checkouts, one error per failed checkout).
+        """
+        run_id = uuid.uuid4().hex[:8]
+        product = Product.objects.create(
+            name=f'Benchmark SKU {run_id}',
+            description='Temporary product created by bench_stock_contention',
+            price=1,
+            stock_quantity=threads * orders,
+            is_active=False
+        )
+        if stripes:
+            stripe_stock(product, stripes)
+
+        users = [
+            User.objects.create_user(f'bench_{run_id}_{i}', f'bench_{run_id}_{i}@example.invalid')
+            for i in range(threads)
+        ]
+        carts = [Cart.objects.create(user=user) for user in users]
+        errors = []
+
+        def worker(cart, user):
+            try:
+                for _ in range(orders):
+                    try:
+                        CartItem.objects.create(cart=cart, product=product, quantity=1)
+                        checkout_cart(cart, user)
+                    except Exception as e:
+                        errors.append(e)
+                        # Start the next order from an empty cart
+                        CartItem.objects.filter(cart=cart).delete()
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker, args=(cart, user)) for cart, user in zip(carts, users)]
+        start = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        # Orders and order items go with their users and product
+        User.objects.filter(id__in=[user.id for user in users]).delete()
+        product.delete()
+
+        return elapsed, threads * orders - len(errors), errors
@@ -0,0 +1,68 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from shop.cache import bump_catalog_version
+from shop.images import plan_variants, read_original, render_all, variants_for
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Backfill WebP/JPEG thumbnails for existing product images, rendering in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Render processes (default: one per CPU)')
+        parser.add_argument('--chunk-size', type=int, default=50, help='Products whose images are held in memory at once')
+        parser.add_argument('--force', action='store_true', help='Also redo products that already have variants')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(Q(image='') | Q(image__isnull=True)).order_by('id')
+        if not options['force']:
+            products = products.filter(image_variants={})
+
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            chunk = []
+            for product in products.iterator(chunk_size=options['chunk_size']):
+                chunk.append(product)
+                if len(chunk) == options['chunk_size']:
+                    ok, errors = self.process(chunk, pool)
+                    done, failed = done + ok, failed + errors
+                    chunk = []
+            if chunk:
+                ok, errors = self.process(chunk, pool)
+                done, failed = done + ok, failed + errors
+
+        if done:
+            bump_catalog_version()  # bulk_update sends no signals
+        self.stdout.write(self.style.SUCCESS(f'✅ Generated variants for {done} products'))
+        if failed:
+            self.stdout.write(self.style.WARNING(f'⚠️  {failed} products skipped'))
+
+    def process(self, products, pool):
+        """Render every variant of a chunk of products in one pool submission"""
+        jobs = []
+        planned = []
+        failed = 0
+        for product in products:
+            try:
+                source = read_original(product)
+                _, plan = plan_variants(source)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'✗ {product.name}: {e}'))
+                continue
+            jobs.extend((source, width, fmt, name) for width, fmt, name in plan)
+            planned.append((product, plan))
+
+        for name, content in render_all(jobs, pool=pool):
+            default_storage.save(name, ContentFile(content))
+
+        now = timezone.now()
+        for product, plan in planned:
+            product.image_variants = variants_for(plan)
+            product.updated_at = now  # bulk_update skips auto_now
+        Product.objects.bulk_update([product for product, _ in planned], ['image_variants', 'updated_at'])
+        return len(planned), failed
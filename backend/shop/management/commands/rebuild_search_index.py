@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from shop.models import Product
+from shop.search import get_inverted_index, update_search_vector, uses_postgres_search
+
+
+class Command(BaseCommand):
+    help = 'Recompute the product full-text search index (tsvector column on PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Products updated per statement')
+
+    def handle(self, *args, **options):
+        if not uses_postgres_search():
+            index = get_inverted_index()
+            self.stdout.write(self.style.SUCCESS(f'Built in-memory index over {index.size} products'))
+            return
+
+        batch_size = options['batch_size']
+        updated = 0
+        last_id = 0
+        while True:
+            ids = list(
+                Product.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            updated += update_search_vector(Product.objects.filter(id__in=ids))
+            last_id = ids[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Reindexed {updated} products'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+from shop.inventory import stripe_stock
+from shop.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Split the stock of hot products across N sub-counters (0 turns striping off)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='+', type=int)
+        parser.add_argument('--stripes', type=int, default=8, help='Number of stripes, 0 to merge back')
+
+    def handle(self, *args, **options):
+        if options['stripes'] < 0:
+            raise CommandError('--stripes must be 0 or more')
+
+        products = Product.objects.filter(id__in=options['product_ids'])
+        missing = set(options['product_ids']) - {product.id for product in products}
+        if missing:
+            raise CommandError(f'Products not found: {sorted(missing)}')
+
+        for product in products:
+            product = stripe_stock(product, options['stripes'])
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {product.name}: {product.total_stock} in stock over {product.stock_stripes or 1} counter(s)'
+            ))
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.15 on 2026-10-18 01:13
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+GIN_INDEX = 'product_search_vector_gin'
+
+
+def create_search_index(apps, schema_editor):
+    """GIN index and backfill only exist on PostgreSQL; other backends use the in-memory index"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON shop_product USING gin (search_vector)'
+    )
+    schema_editor.execute(
+        "UPDATE shop_product SET search_vector = "
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0005_product_active_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 
 
 class Product(models.Model):
@@ -7,13 +9,62 @@ class Product(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock_quantity = models.IntegerField(default=0)
+    reserved_quantity = models.PositiveIntegerField(default=0)  # Held by active cart reservations, 0 when striped
+    stock_stripes = models.PositiveSmallIntegerField(default=0)  # >0: stock lives in StockStripe rows
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # {format: {width: path}}, see shop.images
     is_active = models.BooleanField(default=True)
+    # Weighted name/description tsvector, GIN indexed on PostgreSQL (see shop.search)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of the public catalog
+            models.Index(fields=['is_active', 'created_at', 'id'], name='product_active_created_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+    @property
+    def is_striped(self):
+        return self.stock_stripes > 0
+
+    @property
+    def total_stock(self):
+        """Stock on hand - the sum of the stripes for striped products"""
+        if self.is_striped:
+            return sum(stripe.quantity for stripe in self.stripes.all())
+        return self.stock_quantity
+
+    @property
+    def available_quantity(self):
+        """Stock that is not held by any cart reservation"""
+        if self.is_striped:
+            # Holds on striped products are only kept as reservation rows
+            held = self.reservations.filter(expires_at__gt=timezone.now()).aggregate(
+                total=models.Sum('quantity')
+            )['total'] or 0
+            return self.total_stock - held
+        return self.stock_quantity - self.reserved_quantity
+
+
+class StockStripe(models.Model):
+    """
+    One sub-counter of a striped product's stock.
+    Spreading a bestseller's stock across several rows lets concurrent
+    checkouts decrement different rows instead of queueing on one.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='stripes')
+    stripe = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['product', 'stripe']
+        ordering = ['stripe']
+
+    def __str__(self):
+        return f"{self.product.name} stripe {self.stripe}: {self.quantity}"
@@ -0,0 +1,16 @@
+from django.conf import settings
+from rest_framework.pagination import PageNumberPagination
+from core.pagination import KeysetPagination
+
+
+class ProductCursorPagination(KeysetPagination):
+    """Keyset pagination for the public catalog on (created_at, id)"""
+    page_size = settings.PRODUCT_PAGE_SIZE
+    max_page_size = settings.PRODUCT_MAX_PAGE_SIZE
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """Search results are ordered by rank, so they page by number"""
+    page_size = settings.PRODUCT_PAGE_SIZE
+    max_page_size = settings.PRODUCT_MAX_PAGE_SIZE
+    page_size_query_param = 'page_size'
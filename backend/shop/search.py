@@ -0,0 +1,126 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F
+from .cache import get_catalog_version
+from .models import Product
+
+SEARCH_CONFIG = 'english'
+TOKEN_RE = re.compile(r'\w+')
+
+# Name matches weigh more than description matches, like the A/B tsvector weights
+NAME_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+
+
+def product_search_vector():
+    """tsvector expression stored in Product.search_vector"""
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+    )
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def update_search_vector(queryset):
+    """Recompute the stored tsvector for every product in queryset (PostgreSQL only)"""
+    if uses_postgres_search():
+        return queryset.update(search_vector=product_search_vector())
+    return 0
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    In-memory term -> {product_id: weight} index used when the database
+    has no full-text search (SQLite in development and tests).
+    """
+
+    def __init__(self, rows):
+        self.postings = defaultdict(lambda: defaultdict(int))
+        self.size = 0
+        for pk, name, description in rows:
+            self.size += 1
+            for term in tokenize(name):
+                self.postings[term][pk] += NAME_WEIGHT
+            for term in tokenize(description):
+                self.postings[term][pk] += DESCRIPTION_WEIGHT
+
+    def search(self, query):
+        """Return ids of products matching every query term, best match first"""
+        terms = set(tokenize(query))
+        postings = [self.postings.get(term) for term in terms]
+        if not postings or not all(postings):
+            return []
+
+        postings.sort(key=len)
+        matches = set(postings[0]).intersection(*postings[1:])
+
+        scores = defaultdict(float)
+        for posting in postings:
+            idf = math.log(1 + self.size / len(posting))
+            for pk in matches:
+                scores[pk] += posting[pk] * idf
+        return sorted(matches, key=lambda pk: (-scores[pk], -pk))
+
+
+_index = None
+_index_version = None
+_index_lock = threading.Lock()
+
+
+def get_inverted_index():
+    """Per-process index of active products, rebuilt when the catalog version changes"""
+    global _index, _index_version
+    version = get_catalog_version()
+    with _index_lock:
+        if _index is None or _index_version != version:
+            rows = Product.objects.filter(is_active=True).values_list('id', 'name', 'description')
+            _index = InvertedIndex(rows.iterator(chunk_size=2000))
+            _index_version = version
+        return _index
+
+
+class RankedProducts:
+    """
+    Products in a precomputed rank order. Slicing loads only that slice,
+    so a paginator can page through it one query at a time.
+    """
+
+    def __init__(self, queryset, ids):
+        self.queryset = queryset
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        ids = self.ids[index] if isinstance(index, slice) else [self.ids[index]]
+        products = self.queryset.in_bulk(ids)
+        page = [products[pk] for pk in ids if pk in products]
+        return page if isinstance(index, slice) else page[0]
+
+
+def search_products(queryset, query):
+    """
+    Rank products in queryset against a free-text query.
+    Uses the stored tsvector and its GIN index on PostgreSQL, and the
+    in-memory inverted index everywhere else.
+    """
+    if uses_postgres_search():
+        search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', '-id')
+        )
+    return RankedProducts(queryset, get_inverted_index().search(query))
@@ -1,15 +1,20 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
+from .inventory import set_stock
 from .models import Product
 
 
 class ProductSerializer(serializers.ModelSerializer):
     """Serializer for Product model - includes image URL"""
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    stock_quantity = serializers.IntegerField(source='total_stock', read_only=True)
     
     class Meta:
         model = Product
-        fields = ['id', 'name', 'description', 'price', 'stock_quantity', 'image', 'image_url', 'is_active', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_at', 'updated_at', 'image_url']
+        fields = ['id', 'name', 'description', 'price', 'stock_quantity', 'image', 'image_url', 'image_variants', 'image_srcset', 'is_active', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'image_url', 'image_variants', 'image_srcset']
     
     def get_image_url(self, obj):
         """Return relative URL so it works through nginx proxy"""
@@ -17,6 +22,23 @@ class ProductSerializer(serializers.ModelSerializer):
             return obj.image.url  # Returns /media/products/...
         return None
 
+    def get_image_variants(self, obj):
+        """Resized copies of the image: {format: [{width, url}]}, smallest first"""
+        return {
+            fmt: [
+                {'width': int(width), 'url': default_storage.url(name)}
+                for width, name in sorted(sizes.items(), key=lambda size: int(size[0]))
+            ]
+            for fmt, sizes in obj.image_variants.items()
+        }
+
+    def get_image_srcset(self, obj):
+        """Ready-made srcset strings per format, e.g. {'webp': '/media/...-160w.webp 160w, ...'}"""
+        return {
+            fmt: ', '.join(f"{variant['url']} {variant['width']}w" for variant in variants)
+            for fmt, variants in self.get_image_variants(obj).items()
+        }
+
 
 class ProductCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating/updating products - admin only"""
@@ -24,3 +46,11 @@ class ProductCreateSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'description', 'price', 'stock_quantity', 'image', 'is_active']
         read_only_fields = ['id']
+
+    def update(self, instance, validated_data):
+        """Striped products spread a new stock level over their stripes"""
+        stock = validated_data.pop('stock_quantity', None) if instance.is_striped else None
+        instance = super().update(instance, validated_data)
+        if stock is not None:
+            set_stock(instance, stock)
+        return instance
@@ -0,0 +1,23 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import bump_catalog_version
+from .models import Product, StockStripe
+from .search import update_search_vector
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=StockStripe)
+@receiver(post_delete, sender=StockStripe)
+def invalidate_catalog_cache(sender, **kwargs):
+    """Any product change (API, Django admin, shell) invalidates the catalog cache once committed"""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Product)
+def update_product_search_vector(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored tsvector in step with name and description"""
+    if update_fields is not None and not {'name', 'description'} & set(update_fields):
+        return
+    update_search_vector(Product.objects.filter(pk=instance.pk))
@@ -1,3 +1,63 @@
+import io
+import os
+import tempfile
+from decimal import Decimal
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+from core.models import User
+from .inventory import stripe_stock
+from .models import Product
 
-# Create your tests here.
+
+class ProductCategoryTests(TestCase):
+    def test_category_filter_covers_the_whole_catalog(self):
+        Product.objects.create(name='Wireless Headphone', description='', price=10, stock_quantity=1)
+        Product.objects.bulk_create([
+            Product(name=f'Filler {i}', description='', price=10, stock_quantity=1) for i in range(40)
+        ])
+        response = APIClient().get('/api/products/', {'category': 'audio-devices'})
+        self.assertEqual([product['name'] for product in response.json()['results']], ['Wireless Headphone'])
+
+
+class ProductAdminStockTests(TestCase):
+    """Stock edited in the admin list reaches a striped product's stripes instead of its unused column"""
+
+    def setUp(self):
+        product = Product.objects.create(name='Bestseller', description='', price=5, stock_quantity=10)
+        self.product = stripe_stock(product, 4)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'unused')
+        self.client.force_login(admin)
+
+    def save_changelist(self, **fields):
+        data = {
+            'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 1, 'form-0-id': self.product.pk,
+            'form-0-is_active': 'on', 'form-0-stock_quantity': 10, '_save': 'Save',
+        }
+        data.update({f'form-0-{name}': value for name, value in fields.items()})
+        response = self.client.post('/admin/shop/product/', data)
+        self.assertEqual(response.status_code, 302)
+        self.product.refresh_from_db()
+
+    def test_changelist_shows_and_sets_striped_stock(self):
+        response = self.client.get('/admin/shop/product/')
+        self.assertContains(response, 'name="form-0-stock_quantity" value="10"')
+
+        self.save_changelist(stock_quantity=25)
+        self.assertEqual((self.product.stock_quantity, self.product.total_stock), (0, 25))
+        self.assertEqual(sorted(self.product.stripes.values_list('quantity', flat=True)), [6, 6, 6, 7])
+
+    def test_other_edits_keep_striped_stock(self):
+        self.save_changelist(is_active='', stock_quantity=10)
+        self.assertEqual((self.product.is_active, self.product.stock_quantity, self.product.total_stock), (False, 0, 10))
+
+
+class SeedStripedProductTests(TestCase):
+    def test_reseeding_restocks_striped_products_through_their_stripes(self):
+        product = Product.objects.create(name='Kids Smartwatch', description='', price=1, stock_quantity=3)
+        stripe_stock(product, 4)
+        with tempfile.TemporaryDirectory() as images:
+            call_command('add_category_products', source='directory', source_dir=images, rate=0,
+                         manifest=os.path.join(images, 'manifest.json'), stdout=io.StringIO(), stderr=io.StringIO())
+        product.refresh_from_db()
+        self.assertEqual((product.stock_quantity, product.total_stock, product.price), (0, 100, Decimal('79.99')))
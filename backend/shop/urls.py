@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     ProductListAPIView, 
     ProductDetailAPIView,
+    ProductSearchAPIView,
     AdminProductListCreateAPIView,
     AdminProductDetailAPIView
 )
@@ -9,6 +10,7 @@ from .views import (
 urlpatterns = [
     # Public endpoints
     path('products/', ProductListAPIView.as_view(), name='product-list'),
+    path('products/search/', ProductSearchAPIView.as_view(), name='product-search'),
     path('products/<int:pk>/', ProductDetailAPIView.as_view(), name='product-detail'),
     
     # Admin endpoints
@@ -2,22 +2,66 @@ from rest_framework import generics, status
 from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from core.conditional import ConditionalGetMixin
+from .cache import CatalogCacheMixin, get_catalog_version
+from .categories import filter_category
+from .images import generate_variants
 from .models import Product
+from .pagination import ProductCursorPagination, ProductSearchPagination
+from .search import search_products
 from .serializers import ProductSerializer, ProductCreateSerializer
 
 
-class ProductListAPIView(generics.ListAPIView):
-    """List all active products - Public access"""
-    queryset = Product.objects.filter(is_active=True)
+class ProductListAPIView(ConditionalGetMixin, CatalogCacheMixin, generics.ListAPIView):
+    """
+    List all active products - Public access, cursor paginated
+    GET /api/products/?category=audio-devices narrows the list to a storefront category
+    """
+    queryset = Product.objects.filter(is_active=True).prefetch_related('stripes')
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    pagination_class = ProductCursorPagination
+
+    def filter_queryset(self, queryset):
+        return filter_category(queryset, self.request.query_params.get('category'))
+
+    def get_validators(self, request, *args, **kwargs):
+        # Every catalog write bumps the version, so 304s cost no query
+        return (get_catalog_version(),), None
 
 
-class ProductDetailAPIView(generics.RetrieveAPIView):
+class ProductDetailAPIView(ConditionalGetMixin, CatalogCacheMixin, generics.RetrieveAPIView):
     """Get single product details - Public access"""
-    queryset = Product.objects.filter(is_active=True)
+    queryset = Product.objects.filter(is_active=True).prefetch_related('stripes')
+    serializer_class = ProductSerializer
+    permission_classes = [AllowAny]
+
+    def get_validators(self, request, *args, **kwargs):
+        return (get_catalog_version(),), None
+
+
+class ProductSearchAPIView(generics.ListAPIView):
+    """
+    Full-text search over active products - Public access
+    GET /api/products/search/?q=wireless+charger
+    Results are ranked, name matches first.
+    """
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    pagination_class = ProductSearchPagination
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Query parameter "q" is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Product.objects.filter(is_active=True).prefetch_related('stripes')
+        page = self.paginate_queryset(search_products(queryset, query))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 # Admin-only views
@@ -26,7 +70,7 @@ class AdminProductListCreateAPIView(generics.ListCreateAPIView):
     Admin: List all products (including inactive) and create new products.
     POST supports multipart/form-data for image uploads.
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.prefetch_related('stripes')
     permission_classes = [IsAdminUser]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
@@ -39,6 +83,9 @@ class AdminProductListCreateAPIView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         product = serializer.save()
+
+        if 'image' in request.FILES:
+            generate_variants(product)
         
         # Return full product data
         response_serializer = ProductSerializer(product, context={'request': request})
@@ -50,7 +97,7 @@ class AdminProductDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     Admin: Get, update, or delete a product.
     PUT/PATCH supports multipart/form-data for image uploads.
     """
-    queryset = Product.objects.all()
+    queryset = Product.objects.prefetch_related('stripes')
     permission_classes = [IsAdminUser]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
@@ -65,6 +112,13 @@ class AdminProductDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         product = serializer.save()
+
+        # New upload, or image cleared
+        if 'image' in request.FILES or ('image' in request.data and not product.image):
+            generate_variants(product)
+
+        # Stripes may have been rewritten, drop the prefetched copies
+        product._prefetched_objects_cache = {}
         
         # Return full product data
         response_serializer = ProductSerializer(product, context={'request': request})
@@ -7,6 +7,11 @@ import './AdminOrders.css';
 
 const AdminOrders = () => {
     const [orders, setOrders] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+    const [statusFilter, setStatusFilter] = useState('');
+    const [selected, setSelected] = useState(new Set());
+    const [bulkStatus, setBulkStatus] = useState('SHIPPED');
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const { user } = useAuth();
@@ -16,8 +21,12 @@ const AdminOrders = () => {
         try {
             setLoading(true);
             setError('');
-            const response = await apiClient.get('/admin/orders/');
-            setOrders(response.data);
+            const response = await apiClient.get('/admin/orders/', {
+                params: statusFilter ? { status: statusFilter } : {},
+            });
+            setOrders(response.data.results);
+            setNextPage(response.data.next);
+            setSelected(new Set());
         } catch (err) {
             if (err.response?.status === 403) {
                 setError('Access denied. Admin privileges required.');
@@ -28,7 +37,23 @@ const AdminOrders = () => {
         } finally {
             setLoading(false);
         }
-    }, []);
+    }, [statusFilter]);
+
+    // Older orders come from the cursor link returned by the API
+    const loadMoreOrders = async () => {
+        if (!nextPage) return;
+        try {
+            setLoadingMore(true);
+            const response = await apiClient.get(nextPage);
+            setOrders((prev) => [...prev, ...response.data.results]);
+            setNextPage(response.data.next);
+        } catch (err) {
+            console.error(err);
+            setError('Failed to load orders');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
     useEffect(() => {
         if (!user?.is_admin) {
@@ -50,6 +75,42 @@ const AdminOrders = () => {
         }
     };
 
+    const toggleSelected = (orderId) => {
+        setSelected((prev) => {
+            const next = new Set(prev);
+            if (next.has(orderId)) {
+                next.delete(orderId);
+            } else {
+                next.add(orderId);
+            }
+            return next;
+        });
+    };
+
+    const toggleAll = () => {
+        setSelected(selected.size === orders.length ? new Set() : new Set(orders.map((order) => order.id)));
+    };
+
+    // One request for the whole selection; the response says what happened to each order
+    const applyBulkStatus = async () => {
+        try {
+            const response = await apiClient.post('/admin/orders/bulk-status/', {
+                status: bulkStatus,
+                ids: [...selected],
+            });
+            const outcomes = new Map(response.data.results.map((result) => [result.id, result]));
+            setOrders(orders.map((order) =>
+                outcomes.get(order.id)?.outcome === 'updated' ? { ...order, status: bulkStatus } : order
+            ));
+            setSelected(new Set());
+            const rejected = response.data.results.filter((result) => result.outcome === 'invalid').length;
+            setError(rejected ? `${rejected} order(s) could not be moved to ${bulkStatus}` : '');
+        } catch (err) {
+            console.error('Failed to update order statuses:', err);
+            setError('Failed to update order statuses');
+        }
+    };
+
     const getStatusClass = (status) => {
         switch (status) {
             case 'PENDING': return 'pending';
@@ -78,6 +139,17 @@ const AdminOrders = () => {
                         Order Management
                     </h1>
                     <div className="admin-actions">
+                        <select
+                            value={statusFilter}
+                            onChange={(e) => setStatusFilter(e.target.value)}
+                            className="status-select"
+                        >
+                            <option value="">All statuses</option>
+                            <option value="PENDING">Pending</option>
+                            <option value="PAID">Paid</option>
+                            <option value="SHIPPED">Shipped</option>
+                            <option value="CANCELLED">Cancelled</option>
+                        </select>
                         <button onClick={() => navigate('/admin/products')} className="btn-secondary">
                             Manage Products
                         </button>
@@ -86,6 +158,24 @@ const AdminOrders = () => {
 
                 {error && <div className="error-message">{error}</div>}
 
+                {selected.size > 0 && (
+                    <div className="bulk-actions">
+                        <span>{selected.size} selected</span>
+                        <select
+                            value={bulkStatus}
+                            onChange={(e) => setBulkStatus(e.target.value)}
+                            className="status-select"
+                        >
+                            <option value="PAID">Paid</option>
+                            <option value="SHIPPED">Shipped</option>
+                            <option value="CANCELLED">Cancelled</option>
+                        </select>
+                        <button onClick={applyBulkStatus} className="btn-secondary">
+                            Apply
+                        </button>
+                    </div>
+                )}
+
                 {orders.length === 0 ? (
                     <div className="empty-orders">
                         <h2>No orders yet</h2>
@@ -96,6 +186,13 @@ const AdminOrders = () => {
                         <table className="orders-table">
                             <thead>
                                 <tr>
+                                    <th>
+                                        <input
+                                            type="checkbox"
+                                            checked={orders.length > 0 && selected.size === orders.length}
+                                            onChange={toggleAll}
+                                        />
+                                    </th>
                                     <th>Order ID</th>
                                     <th>Customer</th>
                                     <th>Items</th>
@@ -108,6 +205,13 @@ const AdminOrders = () => {
                             <tbody>
                                 {orders.map((order) => (
                                     <tr key={order.id}>
+                                        <td>
+                                            <input
+                                                type="checkbox"
+                                                checked={selected.has(order.id)}
+                                                onChange={() => toggleSelected(order.id)}
+                                            />
+                                        </td>
                                         <td className="order-id">#{order.id.slice(0, 8)}</td>
                                         <td className="customer-info">
                                             <span className="customer-name">{order.user.username}</span>
@@ -152,9 +256,17 @@ const AdminOrders = () => {
                     </div>
                 )}
 
+                {nextPage && (
+                    <div className="load-more">
+                        <button onClick={loadMoreOrders} disabled={loadingMore} className="btn-secondary">
+                            {loadingMore ? 'Loading...' : 'Load older orders'}
+                        </button>
+                    </div>
+                )}
+
                 <div className="orders-summary">
                     <div className="summary-card">
-                        <span className="summary-label">Total Orders</span>
+                        <span className="summary-label">Orders Shown</span>
                         <span className="summary-value">{orders.length}</span>
                     </div>
                     <div className="summary-card">
@@ -1,4 +1,4 @@
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useState, useCallback, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useCart } from '../context/CartContext';
 import apiClient from '../api/client';
@@ -18,8 +18,9 @@ const Cart = () => {
   const [cart, setCart] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const checkoutKey = useRef(null);
   const navigate = useNavigate();
-  const { fetchCartCount, showToast } = useCart();
+  const { fetchCartCount, updateCartCount, showToast } = useCart();
 
   const fetchCart = useCallback(async () => {
     try {
@@ -39,40 +40,89 @@ const Cart = () => {
     fetchCart();
   }, [fetchCart]);
 
-  const updateQuantity = async (itemId, newQuantity) => {
-    if (newQuantity <= 0) {
-      return;
-    }
+  // Quantity clicks are collected briefly and sent as one batch request
+  const pendingQuantities = useRef(new Map());
+  const flushTimer = useRef(null);
+
+  const applyOperations = async (operations) => {
+    const response = await apiClient.post('/cart/batch/', { operations });
+    setCart(response.data);
+    updateCartCount(response.data.items.length);
+  };
+
+  const flushQuantities = async () => {
+    const operations = [...pendingQuantities.current].map(([productId, quantity]) => ({
+      op: 'set',
+      product_id: productId,
+      quantity,
+    }));
+    pendingQuantities.current.clear();
+    flushTimer.current = null;
+    if (operations.length === 0) return;
 
     try {
-      await apiClient.patch(`/cart/items/${itemId}/`, {
-        quantity: newQuantity,
-      });
-      await fetchCart();
-      fetchCartCount();
+      await applyOperations(operations);
     } catch (err) {
       showToast(err.response?.data?.error || 'Failed to update quantity', 'error');
+      await fetchCart();
     }
   };
 
-  const removeItem = async (itemId) => {
+  const updateQuantity = (item, newQuantity) => {
+    if (newQuantity <= 0) {
+      return;
+    }
+
+    setCart((prev) => ({
+      ...prev,
+      items: prev.items.map((line) => (line.id === item.id ? { ...line, quantity: newQuantity } : line)),
+    }));
+    pendingQuantities.current.set(item.product.id, newQuantity);
+    clearTimeout(flushTimer.current);
+    flushTimer.current = setTimeout(flushQuantities, 400);
+  };
+
+  const removeItem = async (item) => {
+    clearTimeout(flushTimer.current);
+    pendingQuantities.current.delete(item.product.id);
+    const operations = [
+      ...[...pendingQuantities.current].map(([productId, quantity]) => ({ op: 'set', product_id: productId, quantity })),
+      { op: 'remove', product_id: item.product.id },
+    ];
+    pendingQuantities.current.clear();
+
     try {
-      await apiClient.delete(`/cart/items/${itemId}/`);
-      await fetchCart();
-      fetchCartCount();
+      await applyOperations(operations);
       showToast('Item removed from cart', 'success');
     } catch (err) {
       showToast(err.response?.data?.error || 'Failed to remove item', 'error');
     }
   };
 
+  useEffect(() => () => clearTimeout(flushTimer.current), []);
+
   const handleCheckout = async () => {
+    // Send quantity changes still waiting in the batch first
+    if (flushTimer.current) {
+      clearTimeout(flushTimer.current);
+      await flushQuantities();
+    }
+    // Reuse the key until the server answers, so a retry after a dropped connection cannot order twice
+    if (!checkoutKey.current) {
+      checkoutKey.current = crypto.randomUUID();
+    }
     try {
-      await apiClient.post('/orders/checkout/');
+      await apiClient.post('/orders/checkout/', null, {
+        headers: { 'Idempotency-Key': checkoutKey.current },
+      });
+      checkoutKey.current = null;
       fetchCartCount();
       showToast('Order placed successfully!', 'success');
       navigate('/orders');
     } catch (err) {
+      if (err.response) {
+        checkoutKey.current = null;
+      }
       showToast(err.response?.data?.error || 'Checkout failed', 'error');
     }
   };
@@ -127,7 +177,7 @@ const Cart = () => {
 
         <div className="cart-items">
           {cart.items.map((item) => (
-            <div key={item.id} className="cart-item">
+            <div key={item.product.id} className="cart-item">
               <div className="item-info">
                 <h3>{item.product.name}</h3>
                 <p className="item-price">${item.product.price} each</p>
@@ -135,7 +185,7 @@ const Cart = () => {
               <div className="item-controls">
                 <div className="quantity-controls">
                   <button
-                    onClick={() => updateQuantity(item.id, item.quantity - 1)}
+                    onClick={() => updateQuantity(item, item.quantity - 1)}
                     className="btn-quantity"
                     disabled={item.quantity <= 1}
                   >
@@ -143,7 +193,7 @@ const Cart = () => {
                   </button>
                   <span className="quantity">{item.quantity}</span>
                   <button
-                    onClick={() => updateQuantity(item.id, item.quantity + 1)}
+                    onClick={() => updateQuantity(item, item.quantity + 1)}
                     className="btn-quantity"
                   >
                     +
@@ -152,7 +202,7 @@ const Cart = () => {
                 <div className="item-total">
                   ${(parseFloat(item.product.price) * item.quantity).toFixed(2)}
                 </div>
-                <button onClick={() => removeItem(item.id)} className="btn-remove">
+                <button onClick={() => removeItem(item)} className="btn-remove">
                   Remove
                 </button>
               </div>
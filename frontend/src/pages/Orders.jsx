@@ -6,6 +6,8 @@ import './Orders.css';
 
 const Orders = () => {
   const [orders, setOrders] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const navigate = useNavigate();
@@ -15,7 +17,8 @@ const Orders = () => {
       setLoading(true);
       setError('');
       const response = await apiClient.get('/orders/');
-      setOrders(response.data);
+      setOrders(response.data.results);
+      setNextPage(response.data.next);
     } catch (err) {
       setError('Failed to load orders');
       console.error(err);
@@ -24,6 +27,22 @@ const Orders = () => {
     }
   }, []);
 
+  // Older orders come from the cursor link returned by the API
+  const loadMoreOrders = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const response = await apiClient.get(nextPage);
+      setOrders((prev) => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      setError('Failed to load orders');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchOrders();
   }, [fetchOrders]);
@@ -124,6 +143,14 @@ const Orders = () => {
             </div>
           ))}
         </div>
+
+        {nextPage && (
+          <div className="orders-load-more">
+            <button onClick={loadMoreOrders} disabled={loadingMore} className="btn-secondary">
+              {loadingMore ? 'Loading...' : 'Load older orders'}
+            </button>
+          </div>
+        )}
       </div>
     </>
   );
@@ -1,4 +1,4 @@
-import { useEffect, useState, useRef, useMemo } from 'react';
+import { useEffect, useState, useRef } from 'react';
 import { useNavigate, useSearchParams } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
 import { useCart } from '../context/CartContext';
@@ -6,14 +6,7 @@ import apiClient from '../api/client';
 import Navbar from '../components/Navbar';
 import './ProductList.css';
 
-// Category mapping for filtering - using precise, non-overlapping keywords
-const CATEGORY_KEYWORDS = {
-  'mobile-accessories': ['phone case', 'phone charger', 'phone stand', 'phone holder', 'screen protector', 'power bank', 'phone cable', 'phone mount', 'phone grip', 'mobile charger', 'mobile case', 'tablet stand', 'tablet', 'ipad', 'wireless charging', 'charging pad'],
-  'laptop-accessories': ['laptop stand', 'laptop bag', 'laptop sleeve', 'laptop cooling', 'usb hub', 'usb-c hub', 'docking station', 'laptop charger', 'monitor stand', 'desk organizer', 'keyboard', 'webcam', 'mouse pad', 'gaming mouse', 'cable management', 'gaming chair', 'ergonomic chair', 'desk lamp', 'external ssd', 'ssd', 'external drive', 'multiport'],
-  'audio-devices': ['headphone', 'earphone', 'speaker', 'earbuds', 'headset', 'soundbar', 'airpods', 'audio'],
-  'smart-wearables': ['smartwatch', 'smart watch', 'fitness band', 'fitness tracker', 'smart band', 'apple watch', 'galaxy watch'],
-};
-
+// Categories are filtered by the API (?category=), across the whole catalog
 const CATEGORY_LABELS = {
   'mobile-accessories': 'Mobile Accessories',
   'laptop-accessories': 'Laptop Accessories',
@@ -21,8 +14,13 @@ const CATEGORY_LABELS = {
   'smart-wearables': 'Smart Wearables',
 };
 
+// Rendered width of a product card image, used to pick from the srcset
+const CARD_IMAGE_SIZES = '(max-width: 768px) 100vw, 320px';
+
 const ProductList = () => {
   const [products, setProducts] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const { user, logout } = useAuth();
@@ -35,7 +33,7 @@ const ProductList = () => {
 
   useEffect(() => {
     fetchProducts();
-  }, []);
+  }, [category]);
 
   useEffect(() => {
     // Only fetch cart count once when user is available
@@ -52,8 +50,10 @@ const ProductList = () => {
   const fetchProducts = async () => {
     try {
       setLoading(true);
-      const response = await apiClient.get('/products/');
-      setProducts(response.data);
+      const params = CATEGORY_LABELS[category] ? { category } : {};
+      const response = await apiClient.get('/products/', { params });
+      setProducts(response.data.results);
+      setNextPage(response.data.next);
     } catch (err) {
       setError('Failed to load products');
       console.error(err);
@@ -62,17 +62,21 @@ const ProductList = () => {
     }
   };
 
-  // Filter products based on category
-  const filteredProducts = useMemo(() => {
-    if (!category || !CATEGORY_KEYWORDS[category]) {
-      return products;
+  // Fetch the next page using the cursor link returned by the API
+  const loadMoreProducts = async () => {
+    if (!nextPage) return;
+    try {
+      setLoadingMore(true);
+      const response = await apiClient.get(nextPage);
+      setProducts((prev) => [...prev, ...response.data.results]);
+      setNextPage(response.data.next);
+    } catch (err) {
+      showToast('Failed to load more products', 'error');
+      console.error(err);
+    } finally {
+      setLoadingMore(false);
     }
-    const keywords = CATEGORY_KEYWORDS[category];
-    return products.filter((product) => {
-      const searchText = `${product.name} ${product.description}`.toLowerCase();
-      return keywords.some((keyword) => searchText.includes(keyword.toLowerCase()));
-    });
-  }, [products, category]);
+  };
 
   const addToCart = async (productId, productName) => {
     if (!user) {
@@ -113,17 +117,28 @@ const ProductList = () => {
       <div className="product-list-container">
         <div className="header">
           <h1>{pageTitle}</h1>
-          {category && filteredProducts.length === 0 && (
+          {category && products.length === 0 && (
             <p className="no-products-message">No products found in this category.</p>
           )}
         </div>
 
         <div className="products-grid">
-          {filteredProducts.map((product) => (
+          {products.map((product) => (
             <div key={product.id} className="product-card">
               {product.image_url ? (
                 <div className="product-image">
-                  <img src={product.image_url} alt={product.name} />
+                  <picture>
+                    {product.image_srcset?.webp && (
+                      <source type="image/webp" srcSet={product.image_srcset.webp} sizes={CARD_IMAGE_SIZES} />
+                    )}
+                    <img
+                      src={product.image_url}
+                      srcSet={product.image_srcset?.jpeg}
+                      sizes={CARD_IMAGE_SIZES}
+                      alt={product.name}
+                      loading="lazy"
+                    />
+                  </picture>
                   {product.stock_quantity < 5 && product.stock_quantity > 0 && (
                     <span className="stock-badge low">Only {product.stock_quantity} left</span>
                   )}
@@ -166,6 +181,14 @@ const ProductList = () => {
             </div>
           ))}
         </div>
+
+        {nextPage && (
+          <div className="load-more">
+            <button onClick={loadMoreProducts} disabled={loadingMore} className="btn-load-more">
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          </div>
+        )}
       </div>
     </>
   );